@@ -6,7 +6,7 @@ from typing import Dict, Any, List, Optional
 from datetime import datetime
 import logging
 
-from ..services.learning_path_service import LearningPathService, LearningPathServiceError
+from ..services.learning_path_service import get_learning_path_service, LearningPathServiceError
 from ..services.path_recommendation_engine import PathRecommendationEngine, PathRecommendationEngineError
 from ..models.learning_path import Channel, NodeStatus
 from ..models.student import StudentProfile, LearningLevel, LearningStyle
@@ -14,7 +14,7 @@ from ..models.student import StudentProfile, LearningLevel, LearningStyle
 logger = logging.getLogger(__name__)
 
 # 初始化服务
-path_service = LearningPathService()
+path_service = get_learning_path_service()
 recommendation_engine = PathRecommendationEngine()
 
 
@@ -180,8 +180,8 @@ async def get_learning_path(
         student_id = await verify_token(credentials)
         
         # 从学习路径服务获取数据
-        from ..services.learning_path_service import LearningPathService
-        path_service = LearningPathService()
+        from ..services.learning_path_service import get_learning_path_service
+        path_service = get_learning_path_service()
         
         try:
             progress = path_service.get_student_progress(student_id)
@@ -265,7 +265,8 @@ async def list_uploaded_projects(student_id: Optional[str] = None) -> Dict[str,
                         projects.append(project_info)
         else:
             for student_dir in upload_dir.iterdir():
-                if student_dir.is_dir():
+                # 跳过以点开头的目录（非学生目录）
+                if student_dir.is_dir() and not student_dir.name.startswith('.'):
                     for project_dir in student_dir.iterdir():
                         if project_dir.is_dir():
                             project_info = {
@@ -17,7 +17,7 @@ from ..evaluators.ui_analyzer import UIAnalyzer
 from ..evaluators.code_reviewer import CodeReviewer
 from ..evaluators.score_aggregator import ScoreAggregator
 from ..config.settings import assessment_config, path_config
-from .learning_path_service import LearningPathService
+from .learning_path_service import get_learning_path_service
 from ..models.learning_path import NodeStatus
 
 
@@ -34,7 +34,7 @@ class AssessmentService:
             self.ui_analyzer = UIAnalyzer()
             self.code_reviewer = CodeReviewer()
             self.score_aggregator = ScoreAggregator()
-            self.learning_path_service = LearningPathService()
+            self.learning_path_service = get_learning_path_service()
             self.db_service = AssessmentDBService()
             self.rule_service = get_assessment_rule_service()
             
@@ -44,7 +44,7 @@ class AssessmentService:
         
         # 确保学习路径服务可用
         if not hasattr(self, 'learning_path_service'):
-            self.learning_path_service = LearningPathService()
+            self.learning_path_service = get_learning_path_service()
     
     async def submit_assessment(self, student_id: str, deliverables: Dict[str, Any]) -> str:
         """
@@ -1,16 +1,144 @@
 """入学诊断服务 - 生成学生画像的核心服务"""
 
 import logging
-from typing import Dict, Any, List, Optional
-from datetime import datetime
+from typing import Dict, Any, List, Optional, Callable
 import json
 import os
+import re
+import sys
+import time
+import hashlib
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 
 from ..models.student import StudentProfile, LearningLevel, LearningStyle
 from .ai_scoring_service import get_ai_scoring_service
 
 logger = logging.getLogger(__name__)
 
+# 编程题规则评分表：(任一关键字命中, 加分)
+_CODING_STRUCTURE_RULES = (
+    (("def ",), 0.3),
+    (("return ",), 0.3),
+)
+_CODING_LOGIC_RULES = {
+    "code_1": (  # 查找最大值
+        (("max(", ">"), 0.4),
+    ),
+    "code_2": (  # API调用和错误处理
+        (("try:", "except"), 0.2),
+        (("requests.",), 0.2),
+    ),
+}
+
+# 规则评分的分词模式（\w 已覆盖中文字符）
+_TOKEN_RE = re.compile(r"\w+")
+
+# 评估时间戳格式（本地时间，精确到秒）
+_ISO_TIMESTAMP_FORMAT = "%Y-%m-%dT%H:%M:%S"
+
+# 并发AI评分的最大线程数
+_MAX_SCORING_WORKERS = 8
+
+# AI评分结果缓存的最大条目数
+_AI_SCORE_CACHE_SIZE = 4096
+
+# 简答题答案短于该长度时不调用AI，直接使用规则评分
+_MIN_AI_ANSWER_LENGTH = 5
+
+# 主观题题型在日志中的名称，以及未作答时的提示
+_SUBJECTIVE_TYPE_LABELS = {"short_answer": "简答题", "coding": "编程题", "code_analysis": "代码分析题"}
+_UNANSWERED_MESSAGES = {"coding": "未提交代码"}
+
+# 代码分析题规则评分的关键概念
+_ANALYSIS_KEY_CONCEPTS = ("引用", "列表", "append", "修改", "同一个对象")
+
+# 初始建议规则表：概念、编程、工具得分依次对应 (阈值, 建议)
+_SCORE_RECOMMENDATIONS = (
+    (60, "建议先复习基础技术概念，特别是API、HTTP等网络基础知识"),
+    (60, "建议加强编程基础练习，重点关注Python语法和错误处理"),
+    (60, "建议先熟悉开发环境和基础工具，如Git、命令行等"),
+)
+_CHALLENGE_RECOMMENDATIONS = {
+    "debugging": "推荐使用IDE调试功能，多练习错误定位技巧",
+    "time_management": "建议制定详细的学习计划，设置阶段性目标",
+    "motivation": "建议选择与个人兴趣相关的项目进行实践",
+}
+_INTEREST_RECOMMENDATIONS = (
+    ("RAG", "可以重点关注RAG系统构建，这与你的兴趣匹配"),
+    ("移动端", "建议在UI设计和前端开发环节投入更多精力"),
+)
+_DEFAULT_RECOMMENDATION = "你的基础不错，可以按标准路径学习，适当挑战高难度任务"
+
+
+def _ai_score_cache_key(*parts: str) -> str:
+    """由题型、题目和学生答案生成定长的AI评分缓存键"""
+    digest = hashlib.blake2b(digest_size=16)
+    for part in parts:
+        digest.update(part.strip().encode("utf-8"))
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+def _tokenize(text: str) -> List[str]:
+    """规则评分分词：大小写折叠后按单词字符切分，去掉标点"""
+    return _TOKEN_RE.findall(text.casefold())
+
+
+def _token_overlap_score(sample_tokens: frozenset, student_answer: str) -> float:
+    """
+    简答题规则评分：学生答案对参考答案词集的覆盖率
+    
+    纯函数，不涉及AI与日志，批量重新评分时可直接调用
+    
+    Returns:
+        0.0-1.0之间的得分率
+    """
+    if not sample_tokens:
+        return 0.0
+    common_count = len(sample_tokens.intersection(_tokenize(student_answer)))
+    return min(common_count / len(sample_tokens) * 1.2, 1.0)
+
+
+def _intern_correct_answers(data: Dict[str, Any]) -> None:
+    """驻留选择题标准答案，使判题比较可走指针相等的快速路径"""
+    for section in data.get("sections", []):
+        for question in section.get("questions", []):
+            correct_answer = question.get("correct_answer")
+            if isinstance(correct_answer, str):
+                question["correct_answer"] = sys.intern(correct_answer)
+
+
+@lru_cache(maxsize=1)
+def _load_diagnostic_questions() -> Dict[str, Any]:
+    """
+    从JSON文件加载诊断题目
+    
+    每个进程只读取解析一次，结果由所有服务实例只读共享
+    """
+    try:
+        # 获取项目根目录
+        current_dir = os.path.dirname(os.path.abspath(__file__))
+        project_root = os.path.dirname(os.path.dirname(current_dir))
+        json_path = os.path.join(project_root, 'config', 'diagnostic_questions.json')
+        
+        with open(json_path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+            _intern_correct_answers(data)
+            logger.info("✅ 成功从JSON文件加载诊断题目: %s", json_path)
+            return data
+    except FileNotFoundError:
+        logger.error("❌ 诊断题目JSON文件不存在: %s", json_path)
+        raise DiagnosticServiceError("诊断题目文件不存在")
+    except json.JSONDecodeError as e:
+        logger.error("❌ 诊断题目JSON文件格式错误: %s", e)
+        raise DiagnosticServiceError("诊断题目文件格式错误")
+    except Exception as e:
+        logger.error("❌ 加载诊断题目失败: %s", e)
+        raise DiagnosticServiceError(f"加载诊断题目失败: {e}")
+
 
 class DiagnosticService:
     """
@@ -25,33 +153,73 @@ class DiagnosticService:
     生成个性化学生画像用于后续路径推荐。
     """
     
+    __slots__ = (
+        "diagnostic_data", "ai_scoring", "_sections_by_id", "_tool_names", "_tool_category_sizes",
+        "_ai_enabled", "_ai_score_cache", "_ai_score_cache_lock", "_sample_tokens", "_normalized_samples",
+        "_concept_plan", "_coding_plan", "_concept_max_score", "_coding_max_score",
+    )
+    
     def __init__(self):
-        self.diagnostic_data = self._load_diagnostic_questions()
+        self.diagnostic_data = _load_diagnostic_questions()
+        self._sections_by_id = {s["id"]: s for s in self.diagnostic_data.get("sections", [])}
+        # 题库在进程内不变，预先展开为评估计划，评估时不再逐题查字典
+        self._concept_plan = self._compile_question_plan("concepts", {
+            "short_answer": self._score_short_answer_question,
+        })
+        self._coding_plan = self._compile_question_plan("coding", {
+            "coding": self._score_coding_answer,
+            "code_analysis": self._score_analysis_answer,
+        })
+        # 满分由题库决定，同样只算一次；空题库按1计，省去每次的除零判断
+        self._concept_max_score = sum(q[2] for q in self._concept_plan or ()) or 1
+        self._coding_max_score = sum(q[2] for q in self._coding_plan or ()) or 1
+        # 简答题参考答案不变，预先规范化、分词供快速判定和规则评分使用
+        short_answer_questions = [
+            question for _, question_type, _, _, question, _ in self._concept_plan or ()
+            if question_type == "short_answer"
+        ]
+        self._sample_tokens = {
+            question["id"]: frozenset(_tokenize(question["sample_answer"]))
+            for question in short_answer_questions
+        }
+        self._normalized_samples = {
+            question["id"]: question["sample_answer"].strip().casefold()
+            for question in short_answer_questions
+        }
+        # 工具问卷展平为工具名序列 + 各类别工具数，评估时按切片聚合
+        tools_section = self._sections_by_id.get("tools")
+        if tools_section:
+            survey = tools_section["survey"]
+            self._tool_names = tuple(tool["name"] for category in survey for tool in category["tools"])
+            self._tool_category_sizes = tuple(len(category["tools"]) for category in survey)
+        else:
+            self._tool_names = None
+            self._tool_category_sizes = ()
         self.ai_scoring = get_ai_scoring_service()  # 初始化AI评分服务
-        logger.info(f"🧪 诊断服务初始化完成，AI评分: {'已启用' if self.ai_scoring.is_enabled() else '未启用'}")
-    
-    def _load_diagnostic_questions(self) -> Dict[str, Any]:
-        """从JSON文件加载诊断题目"""
-        try:
-            # 获取项目根目录
-            current_dir = os.path.dirname(os.path.abspath(__file__))
-            project_root = os.path.dirname(os.path.dirname(current_dir))
-            json_path = os.path.join(project_root, 'config', 'diagnostic_questions.json')
-            
-            with open(json_path, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-                logger.info(f"✅ 成功从JSON文件加载诊断题目: {json_path}")
-                return data
-        except FileNotFoundError:
-            logger.error(f"❌ 诊断题目JSON文件不存在: {json_path}")
-            raise DiagnosticServiceError("诊断题目文件不存在")
-        except json.JSONDecodeError as e:
-            logger.error(f"❌ 诊断题目JSON文件格式错误: {e}")
-            raise DiagnosticServiceError("诊断题目文件格式错误")
-        except Exception as e:
-            logger.error(f"❌ 加载诊断题目失败: {e}")
-            raise DiagnosticServiceError(f"加载诊断题目失败: {e}")
+        self._ai_enabled = self.ai_scoring.is_enabled()
+        # 相同题目和答案（重试、重新评估）复用AI评分结果，避免重复调用LLM
+        self._ai_score_cache: OrderedDict[str, float] = OrderedDict()
+        self._ai_score_cache_lock = threading.Lock()
+        logger.info("🧪 诊断服务初始化完成，AI评分: %s", '已启用' if self._ai_enabled else '未启用')
     
+    def _compile_question_plan(
+        self,
+        section_id: str,
+        scorers: Dict[str, Callable[[str, Dict[str, Any]], float]]
+    ) -> Optional[tuple]:
+        """
+        将题库章节预编译为评估计划
+        
+        每道题展开为 (题号, 题型, 分值, 标准答案, 原题, 评分器) 元组，评分器按题型预先绑定，
+        客观题为None；章节不存在时返回None
+        """
+        section = self._sections_by_id.get(section_id)
+        if section is None:
+            return None
+        return tuple(
+            (q["id"], q["type"], q["weight"], q.get("correct_answer"), q, scorers.get(q["type"]))
+            for q in section["questions"]
+        )
     
     def get_diagnostic_test(self) -> Dict[str, Any]:
         """
@@ -61,30 +229,29 @@ class DiagnosticService:
         """
         return self.diagnostic_data
     
-    def evaluate_diagnostic_results(self, student_responses: Dict[str, Any]) -> Dict[str, Any]:
+    def evaluate_diagnostic_results(
+        self,
+        student_responses: Dict[str, Any],
+        evaluated_at: Optional[str] = None
+    ) -> Dict[str, Any]:
         """
         评估诊断测试结果，生成学生画像数据
         
         Args:
             student_responses: 学生的回答数据
+            evaluated_at: 评估时间戳；批量评估时可由调用方统一传入，缺省取当前时间
             
         Returns:
             包含各维度得分和画像信息的结果
         """
         try:
-            logger.info(f"🧪 开始评估诊断结果")
-            
-            # 评估概念理解
-            concept_score = self._evaluate_concepts(student_responses.get("concepts", {}))
+            logger.info("🧪 开始评估诊断结果")
             
-            # 评估编程能力
-            coding_score = self._evaluate_coding(student_responses.get("coding", {}))
+            # 一次遍历评估概念理解、编程能力和工具熟悉度
+            concept_score, coding_score, tool_familiarity_score, skill_scores = self._evaluate_all(student_responses)
             
-            # 评估工具熟悉度
-            tool_familiarity_score, skill_scores = self._evaluate_tools(student_responses.get("tools", {}))
-            
-            # 分析学习偏好
-            preferences = self._analyze_preferences(student_responses.get("preferences", {}))
+            # 学习偏好直接读取原始回答，缺省值在生成结果时补齐
+            preferences = student_responses.get("preferences", {})
             
             # 生成综合评估结果
             results = {
@@ -92,150 +259,160 @@ class DiagnosticService:
                 "coding_score": coding_score,  
                 "tool_familiarity": tool_familiarity_score,
                 "skill_scores": skill_scores,
-                "learning_style_preference": preferences["learning_style"],
-                "time_budget_hours_per_week": preferences["time_budget"],
-                "interests": preferences["interests"],
-                "goals": preferences["goals"],
-                "challenges": preferences["challenges"],
+                "learning_style_preference": preferences.get("learning_style", "examples_first"),
+                "time_budget_hours_per_week": preferences.get("time_budget", 6),
+                "interests": preferences.get("interests", []),
+                "goals": preferences.get("goals", []),
+                "challenges": preferences.get("challenges", "concepts"),
                 "overall_readiness": self._calculate_overall_readiness(
                     concept_score, coding_score, tool_familiarity_score
                 ),
                 "recommendations": self._generate_initial_recommendations(
                     concept_score, coding_score, tool_familiarity_score, preferences
                 ),
-                "evaluated_at": datetime.now().isoformat()
+                "evaluated_at": evaluated_at or time.strftime(_ISO_TIMESTAMP_FORMAT)
             }
             
-            logger.info(f"🧪 ✅ 诊断评估完成，整体准备度: {results['overall_readiness']}")
+            if logger.isEnabledFor(logging.INFO):
+                logger.info("🧪 ✅ 诊断评估完成，整体准备度: %s", results["overall_readiness"])
             return results
             
         except Exception as e:
-            logger.error(f"🧪 ❌ 诊断评估失败: {str(e)}")
+            logger.error("🧪 ❌ 诊断评估失败: %s", e)
             raise DiagnosticServiceError(f"诊断评估失败: {str(e)}")
     
-    def _evaluate_concepts(self, concept_responses: Dict[str, Any]) -> int:
-        """评估概念理解得分"""
-        total_score = 0
-        max_score = 0
-        
-        # 从JSON数据中获取概念测试题目
-        concepts_section = next((s for s in self.diagnostic_data["sections"] if s["id"] == "concepts"), None)
-        if not concepts_section:
-            logger.warning("未找到概念测试题目")
-            return 0
-            
-        for question in concepts_section["questions"]:
-            max_score += question["weight"]
-            student_answer = concept_responses.get(question["id"])
+    def _evaluate_all(self, student_responses: Dict[str, Any]) -> tuple[int, int, int, Dict[str, int]]:
+        """
+        一次遍历完成概念、编程、工具三部分评估
+        
+        遍历评估计划时客观题直接计分，已作答的主观题先收集起来统一评分：
+        每道题的AI评分都是一次独立的网络往返，启用AI时提交到线程池并发执行，
+        总耗时从各题耗时之和降为最慢一题的耗时；规则评分直接顺序计算。
+        
+        Returns:
+            (概念得分, 编程得分, 工具熟悉度得分, 各工具得分)
+        """
+        log_info = logger.isEnabledFor(logging.INFO)
+        section_totals = [0, 0]
+        jobs = []
+        
+        for section_index, (plan, responses, missing_message) in enumerate((
+            (self._concept_plan, student_responses.get("concepts", {}), "未找到概念测试题目"),
+            (self._coding_plan, student_responses.get("coding", {}), "未找到编程测试题目"),
+        )):
+            if plan is None:
+                logger.warning(missing_message)
+                continue
             
-            if question["type"] == "multiple_choice":
-                if student_answer == question["correct_answer"]:
-                    total_score += question["weight"]
-                    logger.info(f"  ✅ {question['id']}: 选择题答对 +{question['weight']}分")
-                else:
-                    logger.info(f"  ❌ {question['id']}: 选择题答错")
-            elif question["type"] == "short_answer":
-                # AI智能评分或关键词匹配评分
-                if student_answer:
-                    score = self._score_short_answer(
-                        student_answer, 
-                        question["sample_answer"],
-                        question_text=question.get("question", "")
-                    )
-                    earned = int(question["weight"] * score)
-                    total_score += earned
-                    logger.info(f"  {'✅' if score > 0.6 else '⚠️'} {question['id']}: 简答题 +{earned}/{question['weight']}分")
-                else:
-                    logger.info(f"  ⚠️ {question['id']}: 未作答")
-        
-        return int((total_score / max_score) * 100) if max_score > 0 else 0
+            for question_id, question_type, weight, correct_answer, question, scorer in plan:
+                student_answer = responses.get(question_id)
+                
+                if scorer is not None:
+                    if student_answer:
+                        jobs.append((section_index, question_id, question_type, weight, scorer, student_answer, question))
+                    elif log_info:
+                        logger.info("  ⚠️ %s: %s", question_id, _UNANSWERED_MESSAGES.get(question_type, "未作答"))
+                elif question_type == "multiple_choice":
+                    if student_answer == correct_answer:
+                        section_totals[section_index] += weight
+                        if log_info:
+                            logger.info("  ✅ %s: 选择题答对 +%s分", question_id, weight)
+                    elif log_info:
+                        logger.info("  ❌ %s: 选择题答错", question_id)
+        
+        # 主观题评分（启用AI时并发执行）
+        if len(jobs) > 1 and self._ai_enabled:
+            with ThreadPoolExecutor(max_workers=min(_MAX_SCORING_WORKERS, len(jobs))) as executor:
+                scores = list(executor.map(lambda job: job[4](job[5], job[6]), jobs))
+        else:
+            scores = [job[4](job[5], job[6]) for job in jobs]
+        
+        for (section_index, question_id, question_type, weight, _, _, _), score in zip(jobs, scores):
+            earned = int(weight * score)
+            section_totals[section_index] += earned
+            if log_info:
+                logger.info(
+                    "  %s %s: %s +%s/%s分", '✅' if score > 0.6 else '⚠️',
+                    question_id, _SUBJECTIVE_TYPE_LABELS[question_type], earned, weight
+                )
+        
+        concept_score = section_totals[0] * 100 // self._concept_max_score
+        coding_score = section_totals[1] * 100 // self._coding_max_score
+        tool_familiarity_score, skill_scores = self._evaluate_tools(student_responses.get("tools", {}))
+        
+        return concept_score, coding_score, tool_familiarity_score, skill_scores
     
-    def _evaluate_coding(self, coding_responses: Dict[str, Any]) -> int:
-        """评估编程能力得分"""
-        total_score = 0
-        max_score = 0
-        
-        # 从JSON数据中获取编程测试题目
-        coding_section = next((s for s in self.diagnostic_data["sections"] if s["id"] == "coding"), None)
-        if not coding_section:
-            logger.warning("未找到编程测试题目")
-            return 0
-            
-        for question in coding_section["questions"]:
-            max_score += question["weight"]
-            student_answer = coding_responses.get(question["id"])
-            
-            if question["type"] == "coding":
-                if student_answer:
-                    # AI智能评分或简化代码评估
-                    score = self._score_coding_answer(student_answer, question)
-                    earned = int(question["weight"] * score)
-                    total_score += earned
-                    logger.info(f"  {'✅' if score > 0.6 else '⚠️'} {question['id']}: 编程题 +{earned}/{question['weight']}分")
-                else:
-                    logger.info(f"  ⚠️ {question['id']}: 未提交代码")
-            elif question["type"] == "code_analysis":
-                if student_answer:
-                    score = self._score_analysis_answer(student_answer, question)
-                    earned = int(question["weight"] * score)
-                    total_score += earned
-                    logger.info(f"  {'✅' if score > 0.6 else '⚠️'} {question['id']}: 代码分析题 +{earned}/{question['weight']}分")
-                else:
-                    logger.info(f"  ⚠️ {question['id']}: 未作答")
-        
-        return int((total_score / max_score) * 100) if max_score > 0 else 0
+    def _score_short_answer_question(self, student_answer: str, question: Dict[str, Any]) -> float:
+        """以题目为参数的简答题评分器，带上预处理好的参考答案"""
+        return self._score_short_answer(
+            student_answer,
+            question["sample_answer"],
+            question_text=question.get("question", ""),
+            sample_tokens=self._sample_tokens.get(question["id"]),
+            normalized_sample=self._normalized_samples.get(question["id"])
+        )
     
     def _evaluate_tools(self, tool_responses: Dict[str, Any]) -> tuple[int, Dict[str, int]]:
         """评估工具熟悉度"""
-        skill_scores = {}
-        category_scores = []
-        
-        # 从JSON数据中获取工具调查
-        tools_section = next((s for s in self.diagnostic_data["sections"] if s["id"] == "tools"), None)
-        if not tools_section:
+        if self._tool_names is None:
             logger.warning("未找到工具调查数据")
             return 0, {}
-            
-        for category in tools_section["survey"]:
-            category_name = category["category"]
-            category_total = 0
-            tool_count = len(category["tools"])
-            
-            for tool in category["tools"]:
-                tool_name = tool["name"]
-                # 学生对工具的熟悉度评分（1-5）
-                familiarity = tool_responses.get(tool_name, 1)
-                skill_scores[tool_name] = familiarity * 20  # 转换为百分制
-                category_total += familiarity
-            
-            # 计算类别平均分
+        
+        # 学生对工具的熟悉度评分（1-5），按问卷顺序展平
+        familiarities = [tool_responses.get(tool_name, 1) for tool_name in self._tool_names]
+        skill_scores = {
+            tool_name: familiarity * 20  # 转换为百分制
+            for tool_name, familiarity in zip(self._tool_names, familiarities)
+        }
+        
+        # 按类别切片计算类别平均分
+        category_scores = []
+        start = 0
+        for tool_count in self._tool_category_sizes:
             if tool_count > 0:
-                category_avg = (category_total / tool_count) * 20
-                category_scores.append(category_avg)
+                category_scores.append((sum(familiarities[start:start + tool_count]) / tool_count) * 20)
+            start += tool_count
         
         # 计算总体工具熟悉度
         overall_score = int(sum(category_scores) / len(category_scores)) if category_scores else 0
         
         return overall_score, skill_scores
     
-    def _analyze_preferences(self, preference_responses: Dict[str, Any]) -> Dict[str, Any]:
-        """分析学习偏好"""
-        return {
-            "learning_style": preference_responses.get("learning_style", "examples_first"),
-            "time_budget": preference_responses.get("time_budget", 6),
-            "interests": preference_responses.get("interests", []),
-            "goals": preference_responses.get("goals", []),
-            "challenges": preference_responses.get("challenges", "concepts")
-        }
+    def _get_cached_ai_score(self, cache_key: str) -> Optional[float]:
+        """读取AI评分缓存，命中时刷新为最近使用"""
+        with self._ai_score_cache_lock:
+            score_rate = self._ai_score_cache.get(cache_key)
+            if score_rate is not None:
+                self._ai_score_cache.move_to_end(cache_key)
+            return score_rate
     
-    def _score_short_answer(self, student_answer: str, sample_answer: str, question_text: str = "") -> float:
+    def _cache_ai_score(self, cache_key: str, score_rate: float) -> None:
+        """写入AI评分缓存，超出容量时淘汰最久未使用的条目"""
+        with self._ai_score_cache_lock:
+            self._ai_score_cache[cache_key] = score_rate
+            self._ai_score_cache.move_to_end(cache_key)
+            if len(self._ai_score_cache) > _AI_SCORE_CACHE_SIZE:
+                self._ai_score_cache.popitem(last=False)
+    
+    def _score_short_answer(
+        self,
+        student_answer: str,
+        sample_answer: str,
+        question_text: str = "",
+        sample_tokens: Optional[frozenset] = None,
+        normalized_sample: Optional[str] = None
+    ) -> float:
         """
         简答题评分（优先使用AI评分）
         
+        与参考答案一致时直接满分，过短的答案只做规则评分，这两种情况都不调用AI。
+        
         Args:
             student_answer: 学生答案
             sample_answer: 参考答案
             question_text: 题目内容（用于AI评分）
+            sample_tokens: 预先分词的参考答案词集（缺省时现场分词）
+            normalized_sample: 预先规范化的参考答案（缺省时现场计算）
             
         Returns:
             0.0-1.0之间的得分率
@@ -243,8 +420,19 @@ class DiagnosticService:
         if not student_answer:
             return 0.0
         
+        if normalized_sample is None:
+            normalized_sample = sample_answer.strip().casefold()
+        normalized_answer = student_answer.strip().casefold()
+        if normalized_answer == normalized_sample:
+            logger.info("  📝 与参考答案一致: 100/100")
+            return 1.0
+        
         # 尝试使用AI评分
-        if self.ai_scoring.is_enabled() and question_text:
+        if self._ai_enabled and question_text and len(normalized_answer) >= _MIN_AI_ANSWER_LENGTH:
+            cache_key = _ai_score_cache_key("short_answer", question_text, sample_answer, student_answer)
+            cached_score = self._get_cached_ai_score(cache_key)
+            if cached_score is not None:
+                return cached_score
             try:
                 result = self.ai_scoring.score_short_answer(
                     question=question_text,
@@ -253,23 +441,18 @@ class DiagnosticService:
                     max_score=100
                 )
                 score_rate = result['score'] / 100.0
-                logger.info(f"  📝 AI评分: {result['score']}/100 - {result['feedback']}")
+                logger.info("  📝 AI评分: %s/100 - %s", result['score'], result['feedback'])
+                if result.get('scored_by') == 'AI':
+                    self._cache_ai_score(cache_key, score_rate)
                 return score_rate
             except Exception as e:
-                logger.warning(f"  ⚠️ AI评分失败，使用规则评分: {str(e)}")
+                logger.warning("  ⚠️ AI评分失败，使用规则评分: %s", e)
         
         # 备用：简单的关键词匹配
-        student_words = set(student_answer.lower().split())
-        sample_words = set(sample_answer.lower().split())
-        
-        # 计算词汇重叠度
-        common_words = student_words.intersection(sample_words)
-        if len(sample_words) == 0:
-            return 0.0
-        
-        similarity = len(common_words) / len(sample_words)
-        score_rate = min(similarity * 1.2, 1.0)
-        logger.info(f"  📝 规则评分: {int(score_rate * 100)}/100")
+        if sample_tokens is None:
+            sample_tokens = frozenset(_tokenize(sample_answer))
+        score_rate = _token_overlap_score(sample_tokens, student_answer)
+        logger.info("  📝 规则评分: %d/100", score_rate * 100)
         return score_rate
     
     def _score_coding_answer(self, student_code: str, question: Dict[str, Any]) -> float:
@@ -287,7 +470,11 @@ class DiagnosticService:
             return 0.0
         
         # 尝试使用AI评分
-        if self.ai_scoring.is_enabled():
+        if self._ai_enabled:
+            cache_key = _ai_score_cache_key("coding", question.get("question", ""), student_code)
+            cached_score = self._get_cached_ai_score(cache_key)
+            if cached_score is not None:
+                return cached_score
             try:
                 requirements = question.get("evaluation_criteria", [
                     "代码功能正确",
@@ -302,31 +489,21 @@ class DiagnosticService:
                     max_score=100
                 )
                 score_rate = result['score'] / 100.0
-                logger.info(f"  💻 AI评分: {result['score']}/100 - {result['feedback']}")
+                logger.info("  💻 AI评分: %s/100 - %s", result['score'], result['feedback'])
+                if result.get('scored_by') == 'AI':
+                    self._cache_ai_score(cache_key, score_rate)
                 return score_rate
             except Exception as e:
-                logger.warning(f"  ⚠️ AI评分失败，使用规则评分: {str(e)}")
+                logger.warning("  ⚠️ AI评分失败，使用规则评分: %s", e)
         
-        # 备用：基础结构检查
+        # 备用：基础结构检查 + 关键逻辑检查（根据题目类型）
         score = 0.0
+        for rules in (_CODING_STRUCTURE_RULES, _CODING_LOGIC_RULES.get(question["id"], ())):
+            for keywords, points in rules:
+                if any(keyword in student_code for keyword in keywords):
+                    score += points
         
-        # 基础结构检查
-        if "def " in student_code:
-            score += 0.3
-        if "return " in student_code:
-            score += 0.3
-        
-        # 关键逻辑检查（根据题目类型）
-        if question["id"] == "code_1":  # 查找最大值
-            if "max(" in student_code or ">" in student_code:
-                score += 0.4
-        elif question["id"] == "code_2":  # API调用和错误处理
-            if "try:" in student_code or "except" in student_code:
-                score += 0.2
-            if "requests." in student_code:
-                score += 0.2
-        
-        logger.info(f"  💻 规则评分: {int(score * 100)}/100")
+        logger.info("  💻 规则评分: %d/100", score * 100)
         return min(score, 1.0)
     
     def _score_analysis_answer(self, student_answer: str, question: Dict[str, Any]) -> float:
@@ -344,7 +521,13 @@ class DiagnosticService:
             return 0.0
         
         # 尝试使用AI评分
-        if self.ai_scoring.is_enabled():
+        if self._ai_enabled:
+            cache_key = _ai_score_cache_key(
+                "code_analysis", question.get("question", ""), question.get("code", ""), student_answer
+            )
+            cached_score = self._get_cached_ai_score(cache_key)
+            if cached_score is not None:
+                return cached_score
             try:
                 result = self.ai_scoring.score_code_analysis(
                     question=question.get("question", ""),
@@ -353,20 +536,20 @@ class DiagnosticService:
                     max_score=100
                 )
                 score_rate = result['score'] / 100.0
-                logger.info(f"  🔍 AI评分: {result['score']}/100 - {result['feedback']}")
+                logger.info("  🔍 AI评分: %s/100 - %s", result['score'], result['feedback'])
+                if result.get('scored_by') == 'AI':
+                    self._cache_ai_score(cache_key, score_rate)
                 return score_rate
             except Exception as e:
-                logger.warning(f"  ⚠️ AI评分失败，使用规则评分: {str(e)}")
+                logger.warning("  ⚠️ AI评分失败，使用规则评分: %s", e)
         
         # 备用：简化评分，检查关键概念
-        key_concepts = ["引用", "列表", "append", "修改", "同一个对象"]
         score = 0.0
-        
-        for concept in key_concepts:
+        for concept in _ANALYSIS_KEY_CONCEPTS:
             if concept in student_answer:
                 score += 0.2
         
-        logger.info(f"  🔍 规则评分: {int(score * 100)}/100")
+        logger.info("  🔍 规则评分: %d/100", score * 100)
         return min(score, 1.0)
     
     def _calculate_overall_readiness(self, concept_score: int, coding_score: int, tool_score: int) -> str:
@@ -390,36 +573,28 @@ class DiagnosticService:
         preferences: Dict[str, Any]
     ) -> List[str]:
         """生成初始建议"""
-        recommendations = []
-        
         # 基于得分的建议
-        if concept_score < 60:
-            recommendations.append("建议先复习基础技术概念，特别是API、HTTP等网络基础知识")
-        
-        if coding_score < 60:
-            recommendations.append("建议加强编程基础练习，重点关注Python语法和错误处理")
-        
-        if tool_score < 60:
-            recommendations.append("建议先熟悉开发环境和基础工具，如Git、命令行等")
+        recommendations = [
+            message
+            for score, (threshold, message) in zip(
+                (concept_score, coding_score, tool_score), _SCORE_RECOMMENDATIONS
+            )
+            if score < threshold
+        ]
         
         # 基于学习挑战的建议
         challenge = preferences.get("challenges", "")
-        if challenge == "debugging":
-            recommendations.append("推荐使用IDE调试功能，多练习错误定位技巧")
-        elif challenge == "time_management":
-            recommendations.append("建议制定详细的学习计划，设置阶段性目标")
-        elif challenge == "motivation":
-            recommendations.append("建议选择与个人兴趣相关的项目进行实践")
+        if isinstance(challenge, str) and challenge in _CHALLENGE_RECOMMENDATIONS:
+            recommendations.append(_CHALLENGE_RECOMMENDATIONS[challenge])
         
         # 基于兴趣的建议
         interests = preferences.get("interests", [])
-        if "RAG" in interests:
-            recommendations.append("可以重点关注RAG系统构建，这与你的兴趣匹配")
-        if "移动端" in interests:
-            recommendations.append("建议在UI设计和前端开发环节投入更多精力")
+        recommendations.extend(
+            message for interest, message in _INTEREST_RECOMMENDATIONS if interest in interests
+        )
         
         if not recommendations:
-            recommendations.append("你的基础不错，可以按标准路径学习，适当挑战高难度任务")
+            recommendations.append(_DEFAULT_RECOMMENDATION)
         
         return recommendations
 
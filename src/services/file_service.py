@@ -1,22 +1,143 @@
 """文件处理服务"""
+import asyncio
+import hashlib
 import os
+import re
 import shutil
+import tarfile
 import tempfile
 import zipfile
 from pathlib import Path
-from typing import Dict, List, Optional, Any
+from typing import Dict, List, Optional, Any, Set, Tuple
+from dataclasses import dataclass, field
 import logging
 from datetime import datetime
-import subprocess
+from concurrent.futures import ThreadPoolExecutor
 import git
-from git.exc import GitCommandError
+from git.exc import GitCommandError, InvalidGitRepositoryError
 
 logger = logging.getLogger(__name__)
 
+# 统计代码行数的并发线程数（小文件读取以I/O为主）
+_LINE_COUNT_WORKERS = min(32, (os.cpu_count() or 1) * 4)
+
+# 统计代码行数时每次读取的字节数
+_LINE_COUNT_CHUNK_SIZE = 1 << 20
+
+# 保存上传文件时每次读取写入的字节数
+_UPLOAD_CHUNK_SIZE = 1 << 20
+
+# 解压文件时的复制缓冲区大小
+_ARCHIVE_COPY_BUFFER_SIZE = 1 << 21
+
+# 并发解压zip文件的线程数（zlib解压时会释放GIL）
+_ARCHIVE_EXTRACT_WORKERS = min(8, os.cpu_count() or 1)
+
+# 文件树中每个目录最多保留的子节点数（超出部分仍参与统计）
+_MAX_TREE_CHILDREN = 500
+
+# 超过该大小的代码文件视为生成文件，不统计行数
+_MAX_LOC_FILE_SIZE = 1 << 20
+
+# 视为生成文件的文件名后缀，不统计行数
+_GENERATED_FILE_SUFFIXES = ('.min.js', '-lock.json', '.map')
+
+# 仓库克隆缓存目录名的后缀，缓存与上传目录同级存放，不混入学生目录
+_CLONE_CACHE_DIR_SUFFIX = "_git_cache"
+
+# 部分克隆（--filter）相关的仓库配置，从缓存克隆到学生目录时需要一并保留
+_PARTIAL_CLONE_CONFIG = (
+    ('core', 'repositoryformatversion'),
+    ('extensions', 'partialclone'),
+    ('remote "origin"', 'promisor'),
+    ('remote "origin"', 'partialclonefilter'),
+)
+
+# 仓库克隆缓存保留的提交数上限，超出时按最近使用时间淘汰
+_CLONE_CACHE_MAX_ENTRIES = 32
+
+# 缓存的项目扫描结果数量上限
+_SCAN_CACHE_SIZE = 64
+
+# 项目摘要中每个代码示例的最大字符数
+_CODE_SAMPLE_CHARS = 2000
+
+# 文件扩展名到编程语言的映射
+_LANGUAGE_MAP = {
+    '.py': 'Python',
+    '.js': 'JavaScript',
+    '.ts': 'TypeScript',
+    '.jsx': 'React JSX',
+    '.tsx': 'React TSX',
+    '.java': 'Java',
+    '.cpp': 'C++',
+    '.c': 'C',
+    '.cs': 'C#',
+    '.php': 'PHP',
+    '.rb': 'Ruby',
+    '.go': 'Go',
+    '.rs': 'Rust',
+    '.swift': 'Swift',
+    '.kt': 'Kotlin',
+    '.html': 'HTML',
+    '.css': 'CSS',
+    '.scss': 'SCSS',
+    '.vue': 'Vue.js'
+}
+
+# package.json依赖名到前端/Node框架的映射（按输出顺序排列）
+_JS_FRAMEWORKS = {
+    'react': 'React',
+    'vue': 'Vue.js',
+    'angular': 'Angular',
+    'express': 'Express.js',
+    'next': 'Next.js'
+}
+
+# requirements.txt中出现的包名到Python框架的映射（按输出顺序排列）
+_PYTHON_FRAMEWORKS = {
+    'django': 'Django',
+    'flask': 'Flask',
+    'fastapi': 'FastAPI',
+    'streamlit': 'Streamlit'
+}
+_PYTHON_FRAMEWORK_RE = re.compile('|'.join(_PYTHON_FRAMEWORKS), re.IGNORECASE)
+
+
+@dataclass
+class ProjectScan:
+    """一次项目目录遍历的结果"""
+    total_files: int = 0
+    code_files: List[Path] = field(default_factory=list)
+    loc_files: List[Path] = field(default_factory=list)
+    generated_files: List[str] = field(default_factory=list)
+    languages: Dict[str, int] = field(default_factory=dict)
+    main_files: List[str] = field(default_factory=list)
+    config_files: List[str] = field(default_factory=list)
+    documentation: List[str] = field(default_factory=list)
+    tests: List[str] = field(default_factory=list)
+    file_tree: List[Dict[str, Any]] = field(default_factory=list)
+    top_level_files: Set[str] = field(default_factory=set)
+
 
 class FileService:
     """文件和代码仓库处理服务"""
     
+    # 支持的文件类型
+    SUPPORTED_EXTENSIONS = frozenset({
+        '.py', '.js', '.ts', '.tsx', '.jsx', '.java', '.cpp', '.c', '.h',
+        '.cs', '.php', '.rb', '.go', '.rs', '.swift', '.kt', '.scala',
+        '.html', '.css', '.scss', '.less', '.vue', '.md', '.txt', '.json',
+        '.yaml', '.yml', '.xml', '.sql', '.sh', '.bat', '.dockerfile'
+    })
+    
+    # 排除的目录和文件（遍历时按名称剪枝，不会进入被排除的子树）
+    EXCLUDE_PATTERNS = frozenset({
+        'node_modules', '__pycache__', '.git', '.svn', '.idea', '.vscode',
+        'dist', 'build', 'target', 'bin', 'obj', '.DS_Store', 'Thumbs.db',
+        '*.log', '*.tmp', '*.cache'
+    })
+    
     def __init__(self, upload_dir: str = "./uploads"):
         self.upload_dir = Path(upload_dir).resolve()
         try:
@@ -27,20 +148,11 @@ class FileService:
             self.upload_dir = Path(tempfile.gettempdir()) / "ai_assistant_uploads"
             self.upload_dir.mkdir(parents=True, exist_ok=True)
         
-        # 支持的文件类型
-        self.supported_extensions = {
-            '.py', '.js', '.ts', '.tsx', '.jsx', '.java', '.cpp', '.c', '.h',
-            '.cs', '.php', '.rb', '.go', '.rs', '.swift', '.kt', '.scala',
-            '.html', '.css', '.scss', '.less', '.vue', '.md', '.txt', '.json',
-            '.yaml', '.yml', '.xml', '.sql', '.sh', '.bat', '.dockerfile'
-        }
+        # 仓库克隆缓存目录（与上传目录同级，首次克隆时创建）
+        self.clone_cache_dir = self.upload_dir.with_name(self.upload_dir.name + _CLONE_CACHE_DIR_SUFFIX)
         
-        # 排除的目录和文件
-        self.exclude_patterns = {
-            'node_modules', '__pycache__', '.git', '.svn', '.idea', '.vscode',
-            'dist', 'build', 'target', 'bin', 'obj', '.DS_Store', 'Thumbs.db',
-            '*.log', '*.tmp', '*.cache'
-        }
+        # 项目扫描结果缓存（上传目录内容在分析后不再变化）
+        self._scan_cache: Dict[str, ProjectScan] = {}
     
     async def process_uploaded_files(self, files: List[Any], student_id: str) -> Dict[str, Any]:
         """
@@ -63,10 +175,10 @@ class FileService:
             for file in files:
                 file_path = student_dir / file.filename
                 
-                # 保存上传的文件
-                content = await file.read()
-                with open(file_path, 'wb') as f:
-                    f.write(content)
+                # 分块保存上传的文件，内存中最多保留一个块
+                with open(file_path, 'wb', buffering=_UPLOAD_CHUNK_SIZE) as f:
+                    while chunk := await file.read(_UPLOAD_CHUNK_SIZE):
+                        f.write(chunk)
                 
                 # 如果是压缩文件，解压缩
                 if file.filename.lower().endswith(('.zip', '.tar.gz', '.tar')):
@@ -109,27 +221,13 @@ class FileService:
             clone_dir = self.upload_dir / student_id / f"git_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
             clone_dir.mkdir(parents=True, exist_ok=True)
             
-            # 克隆仓库
+            # 克隆仓库（在线程中执行，不阻塞事件循环）
             logger.info(f"开始克隆仓库: {repo_url}")
-            repo = git.Repo.clone_from(repo_url, clone_dir)
-            
-            # 切换到指定分支
-            if branch != "main" and branch in [ref.name.split('/')[-1] for ref in repo.refs]:
-                repo.git.checkout(branch)
+            repo_info = await asyncio.to_thread(self._clone_sync, repo_url, clone_dir, branch)
             
             # 分析项目结构
             analysis_result = await self._analyze_project_structure(clone_dir)
             
-            # 获取仓库信息
-            repo_info = {
-                "url": repo_url,
-                "branch": branch,
-                "last_commit": str(repo.head.commit),
-                "last_commit_message": repo.head.commit.message.strip(),
-                "last_commit_date": repo.head.commit.committed_datetime.isoformat(),
-                "total_commits": len(list(repo.iter_commits()))
-            }
-            
             logger.info(f"Git仓库克隆完成: {repo_url}")
             
             return {
@@ -147,27 +245,207 @@ class FileService:
             logger.error(f"仓库处理失败: {str(e)}")
             raise FileProcessingError(f"仓库处理失败: {str(e)}")
     
+    def _clone_sync(self, repo_url: str, clone_dir: Path, branch: str) -> Dict[str, Any]:
+        """
+        克隆仓库并读取仓库信息（同步阻塞，只在线程中调用）
+        
+        先用 git ls-remote 解析目标提交，同一仓库同一提交只从远程克隆一次到缓存目录，
+        之后以 git clone --local 从缓存克隆到各学生的目录：只硬链接不可变的对象文件，
+        工作区和 .git 下的配置文件均为各自独立的副本。缓存为部分克隆，
+        学生目录保留指向原仓库的 promisor 配置，读取历史文件内容时按需从原仓库拉取
+        """
+        commit_sha, use_branch = self._resolve_remote_commit(repo_url, branch)
+        
+        # 只取单一分支，文件内容只拉取检出所需部分
+        multi_options = ['--filter=blob:none', '--single-branch']
+        if use_branch:
+            multi_options.extend(['--branch', branch])
+        
+        if commit_sha is None:
+            repo = git.Repo.clone_from(repo_url, clone_dir, multi_options=multi_options)
+        else:
+            cache_dir = self._clone_cache_path(repo_url, commit_sha)
+            if cache_dir.exists():
+                logger.info(f"复用已克隆的仓库: {repo_url}@{commit_sha[:8]}")
+                os.utime(cache_dir)
+            else:
+                cache_dir = self._clone_into_cache(repo_url, cache_dir.parent, multi_options)
+                self._evict_clone_cache()
+            try:
+                repo = self._clone_from_cache(cache_dir, clone_dir, repo_url)
+            except (GitCommandError, InvalidGitRepositoryError) as e:
+                # 缓存可能在检查之后被其他请求淘汰，此时直接从远程克隆
+                logger.warning(f"从缓存克隆失败，改为从远程克隆: {repo_url}, 错误: {str(e)}")
+                shutil.rmtree(clone_dir, ignore_errors=True)
+                clone_dir.mkdir(parents=True, exist_ok=True)
+                repo = git.Repo.clone_from(repo_url, clone_dir, multi_options=multi_options)
+        
+        head_commit = repo.head.commit
+        return {
+            "url": repo_url,
+            "branch": branch,
+            "last_commit": str(head_commit),
+            "last_commit_message": head_commit.message.strip(),
+            "last_commit_date": head_commit.committed_datetime.isoformat(),
+            "total_commits": int(repo.git.rev_list('--count', 'HEAD'))
+        }
+    
+    @staticmethod
+    def _resolve_remote_commit(repo_url: str, branch: str) -> Tuple[Optional[str], bool]:
+        """
+        解析远程仓库要克隆的提交
+        
+        Returns:
+            (提交SHA, 是否按指定分支克隆)；分支为main或不存在时使用默认分支
+        """
+        output = git.cmd.Git().ls_remote(repo_url, 'HEAD', f'refs/heads/{branch}')
+        refs = {}
+        for line in output.splitlines():
+            sha, _, ref = line.partition('\t')
+            refs[ref] = sha
+        
+        branch_ref = f'refs/heads/{branch}'
+        if branch != "main" and branch_ref in refs:
+            return refs[branch_ref], True
+        return refs.get('HEAD'), False
+    
+    def _clone_cache_path(self, repo_url: str, commit_sha: str) -> Path:
+        """仓库克隆缓存目录，按仓库地址和提交区分"""
+        url_key = hashlib.blake2b(repo_url.encode('utf-8'), digest_size=16).hexdigest()
+        return self.clone_cache_dir / url_key / commit_sha
+    
+    @staticmethod
+    def _clone_into_cache(repo_url: str, repo_cache_dir: Path, multi_options: List[str]) -> Path:
+        """
+        克隆到临时目录后再移动到缓存位置，并发克隆同一仓库时以先完成者为准
+        
+        缓存目录以实际克隆到的提交命名：ls-remote 之后分支若有新提交，
+        不会把新提交的内容存到旧提交的目录下
+        
+        Returns:
+            缓存目录
+        """
+        repo_cache_dir.mkdir(parents=True, exist_ok=True)
+        staging_dir = Path(tempfile.mkdtemp(prefix='.staging-', dir=repo_cache_dir))
+        try:
+            staged = git.Repo.clone_from(repo_url, staging_dir, multi_options=multi_options)
+            cache_dir = repo_cache_dir / staged.head.commit.hexsha
+            staged.close()
+            try:
+                os.rename(staging_dir, cache_dir)
+            except OSError:
+                if not cache_dir.exists():
+                    raise
+            return cache_dir
+        finally:
+            if staging_dir.exists():
+                shutil.rmtree(staging_dir, ignore_errors=True)
+    
+    @staticmethod
+    def _clone_from_cache(cache_dir: Path, clone_dir: Path, repo_url: str) -> git.Repo:
+        """从缓存克隆到学生目录，origin 指回原仓库并保留部分克隆配置"""
+        repo = git.Repo.clone_from(str(cache_dir), clone_dir, multi_options=['--local'])
+        with git.Repo(cache_dir) as cache_repo:
+            reader = cache_repo.config_reader('repository')
+            with repo.config_writer('repository') as writer:
+                for section, option in _PARTIAL_CLONE_CONFIG:
+                    if reader.has_option(section, option):
+                        writer.set_value(section, option, reader.get(section, option))
+        repo.remotes.origin.set_url(repo_url)
+        return repo
+    
+    def _evict_clone_cache(self) -> None:
+        """缓存的提交数超过上限时，删除最久未使用的缓存（学生目录中的对象为硬链接，不受影响）"""
+        try:
+            entries = [
+                (entry.stat().st_mtime, entry)
+                for repo_cache_dir in self.clone_cache_dir.iterdir() if repo_cache_dir.is_dir()
+                for entry in repo_cache_dir.iterdir()
+                if entry.is_dir() and not entry.name.startswith('.')
+            ]
+        except OSError as e:
+            # 其他线程同时淘汰缓存时可能出现目录已被删除的情况，留待下次克隆再清理
+            logger.warning(f"清理仓库克隆缓存失败: {str(e)}")
+            return
+        if len(entries) <= _CLONE_CACHE_MAX_ENTRIES:
+            return
+        
+        entries.sort(key=lambda item: item[0])
+        for _, entry in entries[:len(entries) - _CLONE_CACHE_MAX_ENTRIES]:
+            shutil.rmtree(entry, ignore_errors=True)
+            try:
+                entry.parent.rmdir()
+            except OSError:
+                pass
+    
     async def _extract_archive(self, archive_path: Path, extract_dir: Path) -> List[Path]:
-        """提取压缩文件"""
+        """提取压缩文件，返回解压出的文件列表（解压时直接记录，无需事后遍历目录）"""
         extracted_files = []
         
         try:
+            # 解压在线程中执行，不阻塞事件循环，多个上传可以同时解压
             if archive_path.suffix.lower() == '.zip':
-                with zipfile.ZipFile(archive_path, 'r') as zip_ref:
-                    zip_ref.extractall(extract_dir)
-                    extracted_files = [extract_dir / name for name in zip_ref.namelist() 
-                                     if not name.endswith('/')]
+                extracted_files = await asyncio.to_thread(self._extract_zip, archive_path, extract_dir)
             else:
-                # 支持tar.gz等其他格式
-                subprocess.run(['tar', '-xf', str(archive_path), '-C', str(extract_dir)], 
-                             check=True, capture_output=True)
-                extracted_files = list(extract_dir.rglob('*'))
+                extracted_files = await asyncio.to_thread(self._extract_tar, archive_path, extract_dir)
                 
         except Exception as e:
             logger.warning(f"压缩文件提取失败: {str(e)}")
             
         return extracted_files
     
+    @staticmethod
+    def _extract_tar(archive_path: Path, extract_dir: Path) -> List[Path]:
+        """解压tar.gz等格式，流式读取，不需要回退定位"""
+        extracted_files = []
+        with tarfile.open(archive_path, 'r|*', copybufsize=_ARCHIVE_COPY_BUFFER_SIZE) as tar_ref:
+            for member in tar_ref:
+                tar_ref.extract(member, extract_dir, filter='data')
+                if member.isfile():
+                    extracted_files.append(extract_dir / member.name)
+        return extracted_files
+    
+    def _extract_zip(self, archive_path: Path, extract_dir: Path) -> List[Path]:
+        """
+        并发解压zip文件
+        
+        先顺序创建所有目录，再把文件条目分组交给线程池，
+        每个线程使用独立的ZipFile句柄（同一句柄不是线程安全的）
+        """
+        base_dir = os.path.abspath(extract_dir)
+        members = []
+        created_dirs = set()
+        
+        with zipfile.ZipFile(archive_path, 'r') as zip_ref:
+            for info in zip_ref.infolist():
+                target = os.path.normpath(os.path.join(base_dir, info.filename))
+                if not target.startswith(base_dir + os.sep):
+                    logger.warning(f"跳过越界的压缩包条目: {info.filename}")
+                    continue
+                parent = target if info.is_dir() else os.path.dirname(target)
+                if parent not in created_dirs:
+                    os.makedirs(parent, exist_ok=True)
+                    created_dirs.add(parent)
+                if not info.is_dir():
+                    members.append((info, target))
+        
+        if members:
+            workers = min(_ARCHIVE_EXTRACT_WORKERS, len(members))
+            groups = [members[i::workers] for i in range(workers)]
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                # list() 使线程中的异常在这里抛出
+                list(executor.map(lambda group: self._extract_zip_members(archive_path, group), groups))
+        
+        return [extract_dir / info.filename for info, _ in members]
+    
+    @staticmethod
+    def _extract_zip_members(archive_path: Path, members: List[Any]) -> None:
+        """使用独立的ZipFile句柄解压一组条目"""
+        with zipfile.ZipFile(archive_path, 'r') as zip_ref:
+            for info, target in members:
+                with zip_ref.open(info) as src, open(target, 'wb') as dst:
+                    shutil.copyfileobj(src, dst, _ARCHIVE_COPY_BUFFER_SIZE)
+    
     async def _analyze_project_structure(self, project_dir: Path) -> Dict[str, Any]:
         """
         分析项目结构
@@ -179,57 +457,30 @@ class FileService:
             分析结果
         """
         try:
+            # 一次遍历得到文件统计、特殊文件和文件树；结果缓存供get_project_summary复用
+            scan = await asyncio.to_thread(self._scan_project, project_dir)
+            self._cache_scan(project_dir, scan)
+            
             analysis = {
-                "total_files": 0,
-                "code_files": 0,
-                "languages": {},
+                "total_files": scan.total_files,
+                "code_files": len(scan.code_files),
+                "languages": dict(scan.languages),
                 "frameworks": [],
-                "file_tree": [],
-                "main_files": [],
-                "config_files": [],
-                "documentation": [],
-                "tests": [],
+                "file_tree": scan.file_tree,
+                "main_files": scan.main_files,
+                "config_files": scan.config_files,
+                "documentation": scan.documentation,
+                "tests": scan.tests,
+                "generated_files": scan.generated_files,
                 "lines_of_code": 0
             }
             
-            # 遍历项目文件
-            for file_path in project_dir.rglob('*'):
-                if file_path.is_file() and not self._should_exclude(file_path):
-                    analysis["total_files"] += 1
-                    
-                    # 分析文件类型
-                    if file_path.suffix.lower() in self.supported_extensions:
-                        analysis["code_files"] += 1
-                        
-                        # 统计编程语言
-                        lang = self._detect_language(file_path)
-                        if lang:
-                            analysis["languages"][lang] = analysis["languages"].get(lang, 0) + 1
-                        
-                        # 统计代码行数
-                        try:
-                            with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
-                                lines = len(f.readlines())
-                                analysis["lines_of_code"] += lines
-                        except:
-                            pass
-                    
-                    # 识别特殊文件
-                    filename = file_path.name.lower()
-                    if filename in ['main.py', 'app.py', 'index.js', 'main.js', 'index.html']:
-                        analysis["main_files"].append(str(file_path.relative_to(project_dir)))
-                    elif filename in ['package.json', 'requirements.txt', 'pom.xml', 'build.gradle', 'Cargo.toml']:
-                        analysis["config_files"].append(str(file_path.relative_to(project_dir)))
-                    elif filename in ['readme.md', 'readme.txt', 'docs']:
-                        analysis["documentation"].append(str(file_path.relative_to(project_dir)))
-                    elif 'test' in filename or filename.endswith('_test.py'):
-                        analysis["tests"].append(str(file_path.relative_to(project_dir)))
+            # 统计代码行数（不含生成文件）
+            if scan.loc_files:
+                analysis["lines_of_code"] = await asyncio.to_thread(self._count_total_lines, scan.loc_files)
             
             # 检测框架
-            analysis["frameworks"] = await self._detect_frameworks(project_dir)
-            
-            # 生成文件树（限制深度）
-            analysis["file_tree"] = self._generate_file_tree(project_dir, max_depth=3)
+            analysis["frameworks"] = await self._detect_frameworks(project_dir, scan.top_level_files)
             
             return analysis
             
@@ -237,118 +488,183 @@ class FileService:
             logger.error(f"项目结构分析失败: {str(e)}")
             return {"error": str(e)}
     
-    def _should_exclude(self, file_path: Path) -> bool:
-        """检查文件是否应该被排除"""
-        path_parts = file_path.parts
-        for part in path_parts:
-            if part in self.exclude_patterns:
-                return True
-        return False
+    def _scan_project(self, project_dir: Path, max_tree_depth: int = 3) -> ProjectScan:
+        """
+        遍历一次项目目录，同时完成文件分类统计和文件树生成
+        
+        基于os.scandir逐层展开，排除的目录（如node_modules、.git）在目录层面直接跳过，
+        不会进入其子树；同一目录内按名称顺序处理。文件树受深度和每个目录的子节点数限制，
+        文件统计不受影响
+        """
+        scan = ProjectScan()
+        scan.file_tree = self._scan_directory(project_dir, project_dir, scan, max_tree_depth, 0)
+        return scan
+    
+    def _scan_directory(self, directory: Path, project_dir: Path, scan: ProjectScan,
+                        max_tree_depth: int, depth: int) -> List[Dict]:
+        """扫描单个目录，返回该目录在文件树中的节点（超出深度时为空）"""
+        try:
+            with os.scandir(directory) as it:
+                entries = sorted(it, key=lambda entry: entry.name)
+        except OSError:
+            return []
+        
+        in_tree = depth < max_tree_depth
+        tree = []
+        subdirs = []
+        for entry in entries:
+            if entry.name in self.EXCLUDE_PATTERNS:
+                continue
+            
+            is_dir = entry.is_dir(follow_symlinks=False)
+            node = None
+            if in_tree and len(tree) < _MAX_TREE_CHILDREN:
+                node = {
+                    "name": entry.name,
+                    "type": "directory" if is_dir else "file",
+                    "path": f"{directory.name}/{entry.name}"
+                }
+                tree.append(node)
+            
+            if is_dir:
+                subdirs.append((Path(entry.path), node))
+            elif entry.is_file():
+                if depth == 0:
+                    scan.top_level_files.add(entry.name)
+                self._classify_file(entry, project_dir, scan)
+        
+        # 子目录在本目录的文件之后处理，文件树节点已按名称顺序就位
+        for subdir, node in subdirs:
+            children = self._scan_directory(subdir, project_dir, scan, max_tree_depth, depth + 1)
+            if node is not None and depth < max_tree_depth - 1:
+                node["children"] = children
+        
+        return tree
     
-    def _detect_language(self, file_path: Path) -> Optional[str]:
-        """检测文件编程语言"""
+    def _classify_file(self, entry: os.DirEntry, project_dir: Path, scan: ProjectScan) -> None:
+        """统计单个文件并识别特殊文件"""
+        file_path = Path(entry.path)
+        scan.total_files += 1
+        
+        # 分析文件类型
         suffix = file_path.suffix.lower()
-        language_map = {
-            '.py': 'Python',
-            '.js': 'JavaScript',
-            '.ts': 'TypeScript',
-            '.jsx': 'React JSX',
-            '.tsx': 'React TSX',
-            '.java': 'Java',
-            '.cpp': 'C++',
-            '.c': 'C',
-            '.cs': 'C#',
-            '.php': 'PHP',
-            '.rb': 'Ruby',
-            '.go': 'Go',
-            '.rs': 'Rust',
-            '.swift': 'Swift',
-            '.kt': 'Kotlin',
-            '.html': 'HTML',
-            '.css': 'CSS',
-            '.scss': 'SCSS',
-            '.vue': 'Vue.js'
-        }
-        return language_map.get(suffix)
+        if suffix in self.SUPPORTED_EXTENSIONS:
+            scan.code_files.append(file_path)
+            
+            # 压缩、锁定等生成文件和超大文件不统计行数
+            if self._is_generated_file(entry):
+                scan.generated_files.append(str(file_path.relative_to(project_dir)))
+            else:
+                scan.loc_files.append(file_path)
+            
+            # 统计编程语言
+            lang = _LANGUAGE_MAP.get(suffix)
+            if lang:
+                scan.languages[lang] = scan.languages.get(lang, 0) + 1
+        
+        # 识别特殊文件
+        filename = file_path.name.lower()
+        if filename in ['main.py', 'app.py', 'index.js', 'main.js', 'index.html']:
+            scan.main_files.append(str(file_path.relative_to(project_dir)))
+        elif filename in ['package.json', 'requirements.txt', 'pom.xml', 'build.gradle', 'Cargo.toml']:
+            scan.config_files.append(str(file_path.relative_to(project_dir)))
+        elif filename in ['readme.md', 'readme.txt', 'docs']:
+            scan.documentation.append(str(file_path.relative_to(project_dir)))
+        elif 'test' in filename or filename.endswith('_test.py'):
+            scan.tests.append(str(file_path.relative_to(project_dir)))
+    
+    @staticmethod
+    def _is_generated_file(entry: os.DirEntry) -> bool:
+        """按文件名和大小判断是否为生成文件（如压缩后的js、依赖锁定文件）"""
+        if entry.name.lower().endswith(_GENERATED_FILE_SUFFIXES):
+            return True
+        try:
+            return entry.stat().st_size > _MAX_LOC_FILE_SIZE
+        except OSError:
+            return False
+    
+    def _cache_scan(self, project_dir: Path, scan: ProjectScan) -> None:
+        """缓存项目扫描结果，超出容量时淘汰最早的条目"""
+        self._scan_cache.pop(str(project_dir), None)
+        self._scan_cache[str(project_dir)] = scan
+        if len(self._scan_cache) > _SCAN_CACHE_SIZE:
+            del self._scan_cache[next(iter(self._scan_cache))]
+    
+    def _count_total_lines(self, code_files: List[Path]) -> int:
+        """统计代码总行数（多个小文件的读取并发进行）"""
+        with ThreadPoolExecutor(max_workers=min(_LINE_COUNT_WORKERS, len(code_files))) as executor:
+            return sum(executor.map(self._count_lines, code_files))
+    
+    @staticmethod
+    def _count_lines(file_path: Path) -> int:
+        """
+        统计文件行数，读取失败时按0行计
+        
+        以1 MiB为块读取原始字节并计数换行符，无需解码，也不生成行列表；
+        末尾没有换行符的最后一行同样计入。直接使用文件描述符读取，
+        省去文件对象创建时的fstat等额外系统调用
+        """
+        line_count = 0
+        last_chunk = b''
+        try:
+            fd = os.open(file_path, os.O_RDONLY)
+            try:
+                while chunk := os.read(fd, _LINE_COUNT_CHUNK_SIZE):
+                    line_count += chunk.count(b'\n')
+                    last_chunk = chunk
+            finally:
+                os.close(fd)
+        except OSError:
+            return 0
+        if last_chunk and not last_chunk.endswith(b'\n'):
+            line_count += 1
+        return line_count
     
-    async def _detect_frameworks(self, project_dir: Path) -> List[str]:
-        """检测使用的框架"""
+    async def _detect_frameworks(self, project_dir: Path, top_level_files: Set[str]) -> List[str]:
+        """
+        检测使用的框架
+        
+        Args:
+            project_dir: 项目目录
+            top_level_files: 扫描阶段收集的项目根目录文件名，用于判断文件是否存在
+            
+        Returns:
+            框架列表
+        """
         frameworks = []
         
         # 检查package.json
-        package_json = project_dir / "package.json"
-        if package_json.exists():
+        if "package.json" in top_level_files:
+            package_json = project_dir / "package.json"
             try:
                 import json
                 with open(package_json, 'r', encoding='utf-8') as f:
                     data = json.load(f)
-                    deps = {**data.get('dependencies', {}), **data.get('devDependencies', {})}
-                    
-                    if 'react' in deps:
-                        frameworks.append('React')
-                    if 'vue' in deps:
-                        frameworks.append('Vue.js')
-                    if 'angular' in deps:
-                        frameworks.append('Angular')
-                    if 'express' in deps:
-                        frameworks.append('Express.js')
-                    if 'next' in deps:
-                        frameworks.append('Next.js')
+                    found = (data.get('dependencies', {}).keys() | data.get('devDependencies', {}).keys()) \
+                        & _JS_FRAMEWORKS.keys()
+                    frameworks.extend(name for dep, name in _JS_FRAMEWORKS.items() if dep in found)
             except:
                 pass
         
         # 检查requirements.txt
-        requirements = project_dir / "requirements.txt"
-        if requirements.exists():
+        if "requirements.txt" in top_level_files:
+            requirements = project_dir / "requirements.txt"
             try:
                 with open(requirements, 'r', encoding='utf-8') as f:
-                    content = f.read().lower()
-                    if 'django' in content:
-                        frameworks.append('Django')
-                    if 'flask' in content:
-                        frameworks.append('Flask')
-                    if 'fastapi' in content:
-                        frameworks.append('FastAPI')
-                    if 'streamlit' in content:
-                        frameworks.append('Streamlit')
+                    found = {match.lower() for match in _PYTHON_FRAMEWORK_RE.findall(f.read())}
+                    frameworks.extend(name for pkg, name in _PYTHON_FRAMEWORKS.items() if pkg in found)
             except:
                 pass
         
         # 检查特定文件
-        if (project_dir / "manage.py").exists():
+        if "manage.py" in top_level_files:
             frameworks.append('Django')
-        if (project_dir / "app.py").exists() or (project_dir / "main.py").exists():
+        if "app.py" in top_level_files or "main.py" in top_level_files:
             if not any(f in frameworks for f in ['Django', 'FastAPI']):
                 frameworks.append('Python Web App')
         
         return frameworks
     
-    def _generate_file_tree(self, directory: Path, max_depth: int = 3, current_depth: int = 0) -> List[Dict]:
-        """生成文件树结构"""
-        if current_depth >= max_depth:
-            return []
-        
-        tree = []
-        try:
-            for item in sorted(directory.iterdir()):
-                if self._should_exclude(item):
-                    continue
-                
-                node = {
-                    "name": item.name,
-                    "type": "directory" if item.is_dir() else "file",
-                    "path": str(item.relative_to(directory.parent))
-                }
-                
-                if item.is_dir() and current_depth < max_depth - 1:
-                    node["children"] = self._generate_file_tree(item, max_depth, current_depth + 1)
-                
-                tree.append(node)
-        except PermissionError:
-            pass
-        
-        return tree
-    
     def get_project_summary(self, project_path: str) -> Dict[str, Any]:
         """获取项目摘要信息，用于评估"""
         project_dir = Path(project_path)
@@ -367,20 +683,15 @@ class FileService:
         if not project_dir.exists():
             return summary
         
-        # 分析代码文件
-        code_files = []
-        for file_path in project_dir.rglob('*'):
-            if (file_path.is_file() and 
-                file_path.suffix.lower() in self.supported_extensions and
-                not self._should_exclude(file_path)):
-                code_files.append(file_path)
+        # 复用分析阶段的扫描结果，没有时重新扫描
+        scan = self._scan_cache.get(str(project_dir))
+        if scan is None:
+            scan = self._scan_project(project_dir)
+            self._cache_scan(project_dir, scan)
+        code_files = scan.code_files
         
         # 统计语言使用情况
-        language_count = {}
-        for file_path in code_files:
-            lang = self._detect_language(file_path)
-            if lang:
-                language_count[lang] = language_count.get(lang, 0) + 1
+        language_count = scan.languages
         
         if language_count:
             summary["main_language"] = max(language_count, key=language_count.get)
@@ -391,9 +702,9 @@ class FileService:
         for file_path in code_files[:5]:  # 最多取5个文件作为示例
             try:
                 with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
-                    content = f.read()
+                    content = f.read(_CODE_SAMPLE_CHARS)  # 只读取示例所需的开头部分
                     if len(content.strip()) > 0:
-                        summary["code_samples"][str(file_path.relative_to(project_dir))] = content[:2000]  # 限制长度
+                        summary["code_samples"][str(file_path.relative_to(project_dir))] = content
             except:
                 pass
         
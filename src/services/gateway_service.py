@@ -3,6 +3,7 @@ import logging
 from typing import Dict, Any, List, Optional
 from datetime import datetime
 import asyncio
+import heapq
 
 from .assessment_service import AssessmentService
 from ..models.assessment import Assessment, AssessmentStatus
@@ -22,13 +23,17 @@ class GatewayService:
         # 请求队列和并发控制
         self.request_queue = None  # 懒加载
         self.active_assessments = set()
+        self._active_by_student: Dict[str, str] = {}  # 学生ID -> 进行中的评估ID（仅作命中时的快速路径）
         self.max_concurrent = self.config.max_workers
+        self._submit_semaphore = None  # 懒加载，限制同时进行的提交数
         self._process_task = None  # 处理任务引用
         
     async def _ensure_initialized(self):
         """确保异步组件已初始化"""
         if self.request_queue is None:
             self.request_queue = asyncio.Queue()
+        if self._submit_semaphore is None:
+            self._submit_semaphore = asyncio.Semaphore(self.max_concurrent)
         if self._process_task is None:
             self._process_task = asyncio.create_task(self._process_requests())
     
@@ -52,22 +57,25 @@ class GatewayService:
             student_id = request_data["student_id"]
             deliverables = request_data["deliverables"]
             
-            # 检查学生是否有进行中的评估
-            existing_assessment = self._get_active_assessment(student_id)
-            if existing_assessment:
-                return {
-                    "assessment_id": existing_assessment,
-                    "status": "duplicate",
-                    "message": "该学生已有正在进行的评估"
-                }
-            
-            # 提交评估请求
-            assessment_id = await self.assessment_service.submit_assessment(
-                student_id, deliverables
-            )
-            
-            # 记录活跃评估
-            self.active_assessments.add(assessment_id)
+            # 限制同时进行的提交数，批量提交时不会一次性压垮下游服务
+            async with self._submit_semaphore:
+                # 检查学生是否有进行中的评估
+                existing_assessment = self._get_active_assessment(student_id)
+                if existing_assessment:
+                    return {
+                        "assessment_id": existing_assessment,
+                        "status": "duplicate",
+                        "message": "该学生已有正在进行的评估"
+                    }
+                
+                # 提交评估请求
+                assessment_id = await self.assessment_service.submit_assessment(
+                    student_id, deliverables
+                )
+                
+                # 记录活跃评估
+                self.active_assessments.add(assessment_id)
+                self._active_by_student[student_id] = assessment_id
             
             logger.info(f"评估请求已通过网关提交: {assessment_id}")
             
@@ -96,7 +104,7 @@ class GatewayService:
             
             # 如果评估已完成，从活跃列表中移除
             if result["status"] in ["completed", "failed"]:
-                self.active_assessments.discard(assessment_id)
+                self._mark_finished(assessment_id, result.get("student_id"))
             
             return result
             
@@ -134,10 +142,8 @@ class GatewayService:
         try:
             assessments = self.assessment_service.get_all_assessments(student_id)
             
-            # 按时间倒序排序
-            assessments.sort(key=lambda x: x["created_at"], reverse=True)
-            
-            return assessments[:limit]
+            # 按时间倒序取最新的limit条，无需对全部记录排序
+            return heapq.nlargest(limit, assessments, key=lambda x: x["created_at"])
             
         except Exception as e:
             logger.error(f"获取评估历史失败: {str(e)}")
@@ -155,7 +161,7 @@ class GatewayService:
         """
         results = []
         
-        # 并发处理多个请求
+        # 并发处理多个请求（同时进行的提交数受max_concurrent限制）
         tasks = [self.submit_for_assessment(request) for request in requests]
         batch_results = await asyncio.gather(*tasks, return_exceptions=True)
         
@@ -205,19 +211,46 @@ class GatewayService:
             raise GatewayError("至少需要提供一种类型的提交物")
     
     def _get_active_assessment(self, student_id: str) -> Optional[str]:
-        """检查学生是否有进行中的评估"""
+        """
+        检查学生是否有进行中的评估
+        
+        本实例记录过的评估若仍在进行中则直接返回；否则回退到数据库查询，
+        以便发现其他网关实例或其他进程提交的进行中评估。
+        索引中的评估只在数据库查询确认其不再进行中后才移除
+        """
         try:
-            assessments = self.assessment_service.get_all_assessments(student_id)
+            indexed_id = self._active_by_student.get(student_id)
+            if indexed_id is not None:
+                try:
+                    status = self.assessment_service.get_assessment_status(indexed_id)["status"]
+                    if status in ["queued", "in_progress"]:
+                        return indexed_id
+                except Exception as e:
+                    # 查询单条评估状态失败时不能据此认定评估已结束，改为查询数据库
+                    logger.warning(f"查询评估状态失败，改为查询学生的全部评估: {indexed_id}, 错误: {str(e)}")
             
-            for assessment in assessments:
+            for assessment in self.assessment_service.get_all_assessments(student_id):
                 if assessment["status"] in ["queued", "in_progress"]:
-                    return assessment["assessment_id"]
+                    assessment_id = assessment["assessment_id"]
+                    if indexed_id is not None and indexed_id != assessment_id:
+                        self._mark_finished(indexed_id, student_id)
+                    self._active_by_student[student_id] = assessment_id
+                    self.active_assessments.add(assessment_id)
+                    return assessment_id
             
+            if indexed_id is not None:
+                self._mark_finished(indexed_id, student_id)
             return None
             
         except Exception:
             return None
     
+    def _mark_finished(self, assessment_id: str, student_id: Optional[str] = None):
+        """评估结束后从活跃列表和学生索引中移除"""
+        self.active_assessments.discard(assessment_id)
+        if student_id and self._active_by_student.get(student_id) == assessment_id:
+            del self._active_by_student[student_id]
+    
     async def _process_requests(self):
         """处理请求队列（预留接口，用于更复杂的队列管理）"""
         while True:
@@ -247,22 +280,28 @@ class GatewayService:
             from datetime import datetime, timedelta
             cutoff_date = datetime.now() - timedelta(days=days)
             
-            recent_assessments = []
+            # 一次遍历同时完成计数和平均分统计（记录按创建时间倒序返回）
+            total_count = 0
+            completed_count = 0
+            failed_count = 0
+            score_sum = 0
+            scored_count = 0
             for assessment in assessments:
                 created_at = datetime.fromisoformat(assessment["created_at"])
-                if created_at >= cutoff_date:
-                    recent_assessments.append(assessment)
-            
-            # 计算统计信息
-            total_count = len(recent_assessments)
-            completed_count = len([a for a in recent_assessments if a["status"] == "completed"])
-            failed_count = len([a for a in recent_assessments if a["status"] == "failed"])
+                if created_at < cutoff_date:
+                    break
+                
+                total_count += 1
+                status = assessment["status"]
+                if status == "completed":
+                    completed_count += 1
+                    if assessment.get("overall_score"):
+                        score_sum += assessment["overall_score"]
+                        scored_count += 1
+                elif status == "failed":
+                    failed_count += 1
             
-            # 计算平均分
-            completed_assessments = [a for a in recent_assessments 
-                                   if a["status"] == "completed" and a.get("overall_score")]
-            avg_score = sum(a["overall_score"] for a in completed_assessments) / len(completed_assessments) \
-                       if completed_assessments else 0
+            avg_score = score_sum / scored_count if scored_count else 0
             
             return {
                 "period_days": days,
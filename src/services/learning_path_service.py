@@ -2,11 +2,13 @@
 
 import asyncio
 import logging
-from typing import Dict, Any, Optional, List
-from datetime import datetime, timedelta
-import uuid
+from bisect import bisect_right
+from typing import Dict, Any, Optional, List, Tuple
+from datetime import datetime
 import json
 from pathlib import Path
+from functools import lru_cache
+from itertools import chain
 
 from ..models.learning_path import (
     LearningPath, PathNode, Channel, NodeStatus, PathDecision,
@@ -14,55 +16,189 @@ from ..models.learning_path import (
 )
 from ..models.student import StudentProfile, LearningLevel, LearningStyle
 from .progress_repository import ProgressRepository
+from ..utils.singleton import Singleton
 
 logger = logging.getLogger(__name__)
 
+# 学习水平分档门槛（平均分达到 50/70/85 分别进入 L1/L2/L3）及对应水平
+_LEVEL_THRESHOLDS = (50, 70, 85)
+_LEARNING_LEVELS = (
+    LearningLevel.L0,  # 零基础
+    LearningLevel.L1,  # 初级
+    LearningLevel.L2,  # 中级
+    LearningLevel.L3   # 高级/竞赛型
+)
+
+# 各学习水平的初始通道
+_INITIAL_CHANNELS = {
+    LearningLevel.L0: Channel.A,  # 零基础从A通道开始
+    LearningLevel.L1: Channel.B,  # 初级从B通道开始
+    LearningLevel.L2: Channel.B,  # 中级从B通道开始
+    LearningLevel.L3: Channel.C   # 高级从C通道开始
+}
+
+# 路径决策阈值：掌握度高且挫败感低时升级，掌握度低或重试过多时降级
+_UPGRADE_MASTERY = 0.85
+_UPGRADE_MAX_FRUSTRATION = 0.2
+_DOWNGRADE_MASTERY = 0.60
+_DOWNGRADE_RETRY_COUNT = 3
+
+# 无评估结果的路径推荐缓存容量
+_RECOMMENDATION_CACHE_SIZE = 512
+
+# 数据库节点记录中"已完成"状态的取值
+_COMPLETED_STATUS = NodeStatus.COMPLETED.value
+
+# 存储值到枚举成员的映射，直接查字典，不经过 Enum 的构造调用
+_CHANNEL_BY_VALUE = {channel.value: channel for channel in Channel}
+_NODE_STATUS_BY_VALUE = {status.value: status for status in NodeStatus}
+
+# 诊断结果中的学习风格偏好到学习风格的映射
+_STYLE_MAP = {
+    "examples_first": LearningStyle.EXAMPLES_FIRST,
+    "theory_first": LearningStyle.THEORY_FIRST,
+    "hands_on": LearningStyle.HANDS_ON,
+    "visual": LearningStyle.VISUAL
+}
+
+# 升级/降级决策下的通道切换，KEEP决策保持当前通道
+_CHANNEL_TRANSITIONS = {
+    PathDecision.UPGRADE: {
+        Channel.A: Channel.B,
+        Channel.B: Channel.C,
+        Channel.C: Channel.C  # 已经是最高通道
+    },
+    PathDecision.DOWNGRADE: {
+        Channel.C: Channel.B,
+        Channel.B: Channel.A,
+        Channel.A: Channel.A  # 已经是最低通道
+    }
+}
+
+# 通道描述
+_CHANNEL_DESCRIPTIONS = {
+    Channel.A: "基础保底通道，注重基础概念掌握和实践入门",
+    Channel.B: "标准实践通道，涵盖主流技能和完整项目体验",
+    Channel.C: "挑战拓展通道，追求工程化实践和高阶技能"
+}
+
+# 备选方案中的补救学习选项
+_REMEDY_ALTERNATIVE = {
+    "option": "补救学习路径",
+    "description": "通过微课和引导题强化薄弱环节",
+    "estimated_hours": 4,
+    "difficulty": 2
+}
+
 
-class LearningPathService:
+@lru_cache(maxsize=1)
+def _load_learning_paths() -> Dict[str, LearningPath]:
+    """
+    读取并解析学习路径配置
+    
+    配置在运行期间不变，解析结果缓存后由所有 LearningPathService 实例共享；
+    加载失败时抛出异常且不缓存，下次创建实例时重试
+    """
+    try:
+        config_file = Path("config/learning_paths.json")
+        if not config_file.exists():
+            raise FileNotFoundError("学习路径配置文件不存在: config/learning_paths.json")
+        
+        # 一次读入字节再解析，省去文本流逐块解码
+        config_data = json.loads(config_file.read_bytes())
+        
+        learning_paths = {}
+        for path_id, path_config in config_data.items():
+            learning_path = LearningPathService._create_learning_path_from_config(path_config)
+            if learning_path:
+                learning_paths[path_id] = learning_path
+                logger.info("📚 学习路径已加载: %s, 包含 %s 个节点", path_id, len(learning_path.nodes))
+        
+        if not learning_paths:
+            raise ValueError("学习路径配置已读取，但未加载到任何学习路径")
+        
+        logger.info("📚 共加载了 %s 个学习路径", len(learning_paths))
+        return learning_paths
+        
+    except Exception as e:
+        logger.error("📚 加载学习路径配置失败: %s", e)
+        raise
+
+
+class LearningPathService(metaclass=Singleton):
     """学习路径推荐服务类，负责管理个性化学习路径"""
     
     def __init__(self):
-        if not hasattr(self, '_initialized'):
-            self._initialized = True
-            
         # 加载学习路径配置（从JSON文件）
-        if not hasattr(self, 'learning_paths'):
-            self.learning_paths = {}
-            self._load_learning_paths_from_config()
-            logger.info(f"📚 LearningPathService 已初始化")
+        self.learning_paths = {}
+        # get_available_paths 的结果缓存，learning_paths 变更时置空
+        self._paths_cache: Optional[List[Dict[str, Any]]] = None
+        # 无评估结果时的路径推荐缓存（键为决定推荐结果的进度字段），超出容量时淘汰最早写入的条目
+        self._recommendation_cache: Dict[tuple, Dict[str, Any]] = {}
+        self._load_learning_paths_from_config()
+        logger.info("📚 LearningPathService 已初始化")
     
     def _load_learning_paths_from_config(self):
-        """从配置文件加载学习路径"""
-        try:
-            config_file = Path("config/learning_paths.json")
-            if not config_file.exists():
-                raise FileNotFoundError("学习路径配置文件不存在: config/learning_paths.json")
-            
-            with open(config_file, 'r', encoding='utf-8') as f:
-                config_data = json.load(f)
-            
-            for path_id, path_config in config_data.items():
-                learning_path = self._create_learning_path_from_config(path_config)
-                if learning_path:
-                    self.learning_paths[path_id] = learning_path
-                    logger.info(f"📚 学习路径已加载: {path_id}, 包含 {len(learning_path.nodes)} 个节点")
-            
-            if not self.learning_paths:
-                raise ValueError("学习路径配置已读取，但未加载到任何学习路径")
-            
-            logger.info(f"📚 共加载了 {len(self.learning_paths)} 个学习路径")
-            
-        except Exception as e:
-            logger.error(f"📚 加载学习路径配置失败: {str(e)}")
-            raise
+        """从配置文件加载学习路径（解析结果在进程内共享，只解析一次）"""
+        self.learning_paths.update(_load_learning_paths())
+        self._paths_cache = None
+        self._build_node_index()
+    
+    def _build_node_index(self):
+        """建立节点ID到节点的索引，节点查询不再逐个遍历学习路径"""
+        # 按加载顺序排列的学习路径，第一个为默认路径
+        self._paths_list: Tuple[LearningPath, ...] = tuple(self.learning_paths.values())
+        
+        self._nodes_by_id: Dict[str, PathNode] = {}
+        for path in self._paths_list:
+            for node in path.nodes:
+                # 多个路径包含同一节点时以先加载的为准
+                self._nodes_by_id.setdefault(node.id, node)
+        
+        # 节点学习顺序（只取第一个路径）及各节点在序列中的位置
+        self._default_path: LearningPath = self._paths_list[0]
+        self._node_sequence = tuple(node.id for node in sorted(self._default_path.nodes, key=lambda x: x.order))
+        # 新学生的起始节点（路径无节点时为 None）
+        self._first_node_id: Optional[str] = self._node_sequence[0] if self._node_sequence else None
+        self._node_positions: Dict[str, int] = {}
+        for index, node_id in enumerate(self._node_sequence):
+            self._node_positions.setdefault(node_id, index)
+        # 各节点的后继节点（最后一个节点没有后继）
+        self._next_node_of: Dict[str, str] = {
+            node_id: self._node_sequence[index + 1]
+            for node_id, index in self._node_positions.items()
+            if index + 1 < len(self._node_sequence)
+        }
+        
+        # 各节点展开后的补救资源（降级时作为脚手架资源）
+        self._flat_remedy_resources: Dict[str, Tuple[str, ...]] = {
+            node_id: tuple(chain.from_iterable(node.remedy_resources.values()))
+            for node_id, node in self._nodes_by_id.items()
+        }
+        
+        # 各节点切换到各通道的备选方案（只包含同时配置了时长和难度的通道）
+        self._channel_options: Dict[str, Dict[Channel, Dict[str, Any]]] = {
+            node_id: {
+                channel: {
+                    "option": f"切换到{channel.value}通道",
+                    "description": _CHANNEL_DESCRIPTIONS[channel],
+                    "estimated_hours": node.estimated_hours[channel],
+                    "difficulty": node.difficulty_level[channel]
+                }
+                for channel in Channel
+                if channel in node.estimated_hours and channel in node.difficulty_level
+            }
+            for node_id, node in self._nodes_by_id.items()
+        }
     
-    def _create_learning_path_from_config(self, config: Dict[str, Any]) -> Optional[LearningPath]:
+    @classmethod
+    def _create_learning_path_from_config(cls, config: Dict[str, Any]) -> Optional[LearningPath]:
         """从配置数据创建学习路径对象"""
         try:
             # 创建节点列表
             nodes = []
             for node_config in config.get("nodes", []):
-                node = self._create_node_from_config(node_config)
+                node = cls._create_node_from_config(node_config)
                 if node:
                     nodes.append(node)
             
@@ -80,10 +216,11 @@ class LearningPathService:
             return learning_path
             
         except Exception as e:
-            logger.error(f"📚 从配置创建学习路径失败: {str(e)}")
+            logger.error("📚 从配置创建学习路径失败: %s", e)
             return None
     
-    def _create_node_from_config(self, node_config: Dict[str, Any]) -> Optional[PathNode]:
+    @staticmethod
+    def _create_node_from_config(node_config: Dict[str, Any]) -> Optional[PathNode]:
         """从配置数据创建学习节点"""
         try:
             # 解析通道任务
@@ -130,87 +267,66 @@ class LearningPathService:
             return node
             
         except Exception as e:
-            logger.error(f"📚 从配置创建学习节点失败: {str(e)}")
+            logger.error("📚 从配置创建学习节点失败: %s", e)
             return None
     
     # 备用节点构造函数已移除，必须依赖配置文件提供所有节点定义
     
     def _get_channel_tasks_for_node(self, node_id: str) -> Dict[Channel, Dict[str, Any]]:
         """获取节点的A/B/C通道任务定义"""
-        # 从已加载的学习路径中查找节点
-        for path in self.learning_paths.values():
-            for node in path.nodes:
-                if node.id == node_id:
-                    return node.channel_tasks
-        
-        # 未在配置中找到节点
-        raise ValueError(f"未找到节点的通道任务定义: {node_id}")
+        node = self._nodes_by_id.get(node_id)
+        if node is None:
+            # 未在配置中找到节点
+            raise ValueError(f"未找到节点的通道任务定义: {node_id}")
+        return node.channel_tasks
     
     def _get_estimated_hours_for_node(self, node_id: str) -> Dict[Channel, int]:
         """获取节点的预估学习时长"""
-        # 从已加载的学习路径中查找节点
-        for path in self.learning_paths.values():
-            for node in path.nodes:
-                if node.id == node_id:
-                    return node.estimated_hours
-        
-        # 未在配置中找到节点
-        raise ValueError(f"未找到节点的预估时长: {node_id}")
+        node = self._nodes_by_id.get(node_id)
+        if node is None:
+            # 未在配置中找到节点
+            raise ValueError(f"未找到节点的预估时长: {node_id}")
+        return node.estimated_hours
     
     def _get_difficulty_level_for_node(self, node_id: str) -> Dict[Channel, int]:
         """获取节点的难度等级 (1-10)"""
-        # 从已加载的学习路径中查找节点
-        for path in self.learning_paths.values():
-            for node in path.nodes:
-                if node.id == node_id:
-                    return node.difficulty_level
-        
-        # 未在配置中找到节点
-        raise ValueError(f"未找到节点的难度等级: {node_id}")
+        node = self._nodes_by_id.get(node_id)
+        if node is None:
+            # 未在配置中找到节点
+            raise ValueError(f"未找到节点的难度等级: {node_id}")
+        return node.difficulty_level
     
     def _get_checkpoint_requirements(self, node_id: str) -> List[str]:
         """获取门槛卡要求"""
-        # 从已加载的学习路径中查找节点
-        for path in self.learning_paths.values():
-            for node in path.nodes:
-                if node.id == node_id:
-                    return node.checkpoint.must_pass
-        
-        # 未在配置中找到节点
-        raise ValueError(f"未找到节点的门槛卡要求: {node_id}")
+        node = self._nodes_by_id.get(node_id)
+        if node is None:
+            # 未在配置中找到节点
+            raise ValueError(f"未找到节点的门槛卡要求: {node_id}")
+        return node.checkpoint.must_pass
     
     def _get_checkpoint_evidence(self, node_id: str) -> List[str]:
         """获取门槛卡证据要求"""
-        # 从已加载的学习路径中查找节点
-        for path in self.learning_paths.values():
-            for node in path.nodes:
-                if node.id == node_id:
-                    return node.checkpoint.evidence
-        
-        # 未在配置中找到节点
-        raise ValueError(f"未找到节点的门槛卡证据: {node_id}")
+        node = self._nodes_by_id.get(node_id)
+        if node is None:
+            # 未在配置中找到节点
+            raise ValueError(f"未找到节点的门槛卡证据: {node_id}")
+        return node.checkpoint.evidence
     
     def _get_auto_grade_rules(self, node_id: str) -> Dict[str, Any]:
         """获取自动评分规则"""
-        # 从已加载的学习路径中查找节点
-        for path in self.learning_paths.values():
-            for node in path.nodes:
-                if node.id == node_id:
-                    return node.checkpoint.auto_grade
-        
-        # 未在配置中找到节点
-        raise ValueError(f"未找到节点的自动评分规则: {node_id}")
+        node = self._nodes_by_id.get(node_id)
+        if node is None:
+            # 未在配置中找到节点
+            raise ValueError(f"未找到节点的自动评分规则: {node_id}")
+        return node.checkpoint.auto_grade
     
     def _get_remedy_resources(self, node_id: str) -> Dict[str, List[str]]:
         """获取补救资源"""
-        # 从已加载的学习路径中查找节点
-        for path in self.learning_paths.values():
-            for node in path.nodes:
-                if node.id == node_id:
-                    return node.remedy_resources
-        
-        # 未在配置中找到节点
-        raise ValueError(f"未找到节点的补救资源: {node_id}")
+        node = self._nodes_by_id.get(node_id)
+        if node is None:
+            # 未在配置中找到节点
+            raise ValueError(f"未找到节点的补救资源: {node_id}")
+        return node.remedy_resources
     
     async def create_student_profile(
         self, 
@@ -240,7 +356,7 @@ class LearningPathService:
             retry_count=0
         )
         
-        logger.info(f"📚 学生画像已创建: {student_id}, 水平: {level.value}")
+        logger.info("📚 学生画像已创建: %s, 水平: %s", student_id, level.value)
         return profile
     
     def _determine_learning_level(self, diagnostic_results: Dict[str, Any]) -> LearningLevel:
@@ -251,38 +367,19 @@ class LearningPathService:
         
         average_score = (concept_score + coding_score + tool_familiarity) / 3
         
-        if average_score >= 85:
-            return LearningLevel.L3  # 高级/竞赛型
-        elif average_score >= 70:
-            return LearningLevel.L2  # 中级
-        elif average_score >= 50:
-            return LearningLevel.L1  # 初级
-        else:
-            return LearningLevel.L0  # 零基础
+        # 平均分达到某档门槛即进入该档，bisect_right 返回已达到的门槛个数
+        return _LEARNING_LEVELS[bisect_right(_LEVEL_THRESHOLDS, average_score)]
     
     def _identify_weak_skills(self, diagnostic_results: Dict[str, Any]) -> List[str]:
         """识别薄弱技能"""
-        weak_skills = []
         skill_scores = diagnostic_results.get("skill_scores", {})
-        
-        for skill, score in skill_scores.items():
-            if score < 60:  # 60分以下认为是薄弱技能
-                weak_skills.append(skill)
-        
-        return weak_skills
+        # 60分以下认为是薄弱技能
+        return [skill for skill, score in skill_scores.items() if score < 60]
     
     def _determine_learning_style(self, diagnostic_results: Dict[str, Any]) -> LearningStyle:
         """确定学习风格"""
         style_preference = diagnostic_results.get("learning_style_preference", "examples_first")
-        
-        style_mapping = {
-            "examples_first": LearningStyle.EXAMPLES_FIRST,
-            "theory_first": LearningStyle.THEORY_FIRST,
-            "hands_on": LearningStyle.HANDS_ON,
-            "visual": LearningStyle.VISUAL
-        }
-        
-        return style_mapping.get(style_preference, LearningStyle.EXAMPLES_FIRST)
+        return _STYLE_MAP.get(style_preference, LearningStyle.EXAMPLES_FIRST)
     
     async def initialize_student_path(
         self, 
@@ -292,25 +389,23 @@ class LearningPathService:
         """为学生初始化学习路径进度"""
         
         # 🔍 检查是否已有学习进度
-        existing_progress = ProgressRepository.get_student_progress(student_id)
+        existing_progress = await asyncio.to_thread(ProgressRepository.get_student_progress, student_id)
         if existing_progress:
-            logger.warning(f"📚 ⚠️ 学生 {student_id} 已有学习进度，跳过初始化")
+            logger.warning("📚 ⚠️ 学生 %s 已有学习进度，跳过初始化", student_id)
             raise LearningPathServiceError(f"学生 {student_id} 已有学习进度，无法重新初始化。如需重新开始学习，请先清除现有进度。")
         
         # 根据学生水平确定起始通道
         initial_channel = self._determine_initial_channel(profile.level)
         
-        # 从配置中获取第一个节点（按 order 排序）
+        # 从配置中获取第一个节点（第一个学习路径按 order 排序后的首个节点，加载时已确定）
         if not self.learning_paths:
             raise ValueError("未加载任何学习路径，无法初始化学生学习路径")
-        # 取第一个学习路径
-        first_path = next(iter(self.learning_paths.values()))
-        if not first_path.nodes:
+        first_node_id = self._first_node_id
+        if first_node_id is None:
             raise ValueError("学习路径无任何节点，无法初始化学生学习路径")
-        first_node = sorted(first_path.nodes, key=lambda n: n.order)[0]
-        first_node_id = first_node.id
         
-        # 创建进度跟踪
+        # 创建进度跟踪（开始、最后活动和更新时间取同一时刻）
+        now = datetime.now()
         progress = StudentPathProgress(
             student_id=student_id,
             current_node_id=first_node_id,  # 从配置的第一个节点开始
@@ -320,15 +415,18 @@ class LearningPathService:
             mastery_scores={},
             frustration_level=0.0,
             retry_counts={},
-            started_at=datetime.now()
+            started_at=now,
+            last_activity_at=now,
+            updated_at=now
         )
         
-        # 根据薄弱技能初始化掌握度分数
-        for skill in profile.weak_skills:
-            progress.mastery_scores[skill] = 0.3  # 薄弱技能起始分数较低
+        # 根据薄弱技能初始化掌握度分数（薄弱技能起始分数较低）
+        progress.mastery_scores.update(dict.fromkeys(profile.weak_skills, 0.3))
         
-        # 持久化到数据库
-        ProgressRepository.upsert_student_progress(
+        # 持久化到数据库：全局进度和第一个节点状态在同一事务中写入
+        # 数据库访问是同步阻塞的，放到线程中执行以免阻塞事件循环
+        await asyncio.to_thread(
+            ProgressRepository.save_progress,
             student_id=student_id,
             current_node_id=first_node_id,
             current_channel=initial_channel,
@@ -336,49 +434,41 @@ class LearningPathService:
             frustration_level=0.0,
             started_at=progress.started_at,
             last_activity_at=progress.last_activity_at,
-        )
-        # 初始化第一个节点状态
-        ProgressRepository.upsert_node_progress(
-            student_id=student_id,
-            node_id=first_node_id,
-            status=NodeStatus.AVAILABLE,
-            used_channel=None,
-            score=None,
-            attempt_count=0,
-            started_at=None,
-            completed_at=None,
+            nodes=[{
+                "node_id": first_node_id,
+                "status": NodeStatus.AVAILABLE,
+                "used_channel": None,
+                "score": None,
+                "attempt_count": 0,
+                "started_at": None,
+                "completed_at": None,
+            }],
         )
         
-        logger.info(f"📚 学生学习路径已初始化: {student_id}, 起始通道: {initial_channel.value}")
+        logger.info("📚 学生学习路径已初始化: %s, 起始通道: %s", student_id, initial_channel.value)
         return progress
     
     async def clear_student_progress(self, student_id: str) -> bool:
         """清除学生学习进度（用于重新开始学习）"""
         try:
             # 检查是否存在学习进度
-            existing_progress = ProgressRepository.get_student_progress(student_id)
+            existing_progress = await asyncio.to_thread(ProgressRepository.get_student_progress, student_id)
             if not existing_progress:
-                logger.warning(f"📚 ⚠️ 学生 {student_id} 没有学习进度，无需清除")
+                logger.warning("📚 ⚠️ 学生 %s 没有学习进度，无需清除", student_id)
                 return False
             
             # 清除学生进度数据
-            ProgressRepository.clear_student_progress(student_id)
-            logger.info(f"📚 ✅ 学生 {student_id} 的学习进度已清除")
+            await asyncio.to_thread(ProgressRepository.clear_student_progress, student_id)
+            logger.info("📚 ✅ 学生 %s 的学习进度已清除", student_id)
             return True
             
         except Exception as e:
-            logger.error(f"📚 ❌ 清除学习进度失败: {str(e)}")
+            logger.error("📚 ❌ 清除学习进度失败: %s", e)
             raise LearningPathServiceError(f"清除学习进度失败: {str(e)}")
     
     def _determine_initial_channel(self, level: LearningLevel) -> Channel:
         """根据学习水平确定初始通道"""
-        channel_mapping = {
-            LearningLevel.L0: Channel.A,  # 零基础从A通道开始
-            LearningLevel.L1: Channel.B,  # 初级从B通道开始
-            LearningLevel.L2: Channel.B,  # 中级从B通道开始
-            LearningLevel.L3: Channel.C   # 高级从C通道开始
-        }
-        return channel_mapping.get(level, Channel.B)
+        return _INITIAL_CHANNELS.get(level, Channel.B)
     
     async def recommend_next_step(
         self, 
@@ -387,34 +477,34 @@ class LearningPathService:
     ) -> PathRecommendation:
         """推荐下一步学习路径"""
         
-        db_data = ProgressRepository.get_student_progress(student_id)
+        db_data = await asyncio.to_thread(ProgressRepository.get_student_progress, student_id)
         if not db_data:
-            raise ValueError(f"学生学习进度不存在: {student_id}")
-        p = db_data["progress"]
-        progress = StudentPathProgress(
-            student_id=student_id,
-            current_node_id=p["current_node_id"],
-            current_channel=Channel(p["current_channel"]),
-            node_statuses={},  # 如有需要可从 nodes 填充
-            completed_nodes=[n["node_id"] for n in db_data["nodes"] if n["status"] == NodeStatus.COMPLETED.value],
-            completed_channels={
-                n["node_id"]: (n["used_channel"] or "") for n in db_data["nodes"] if n["status"] == NodeStatus.COMPLETED.value
-            },
-            total_study_hours=float(p["total_study_hours"]),
-            mastery_scores={},
-            frustration_level=float(p["frustration_level"]),
-            retry_counts={},
-            started_at=p["started_at"],
-            last_activity_at=p["last_activity_at"],
-            updated_at=p["updated_at"],
-        )
+            raise StudentProgressNotFoundError(student_id)
+        progress = self._materialize_progress(student_id, db_data)
         
         current_node_id = progress.current_node_id
         current_channel = progress.current_channel
         
+        # 没有评估结果时推荐内容只取决于以下进度字段（含触发因子中的重试次数），
+        # 进度未变化（如页面轮询）时复用上次计算的字段，但每次都构建新的推荐对象
+        cache_key = None
+        if not assessment_result:
+            cache_key = (
+                student_id, current_node_id, current_channel,
+                progress.frustration_level,
+                progress.retry_counts.get(current_node_id, 0),
+                tuple(progress.completed_nodes)
+            )
+            cached = self._recommendation_cache.get(cache_key)
+            if cached is not None:
+                return PathRecommendation(**cached)
+        
+        # 决策和推荐理由共用同一份触发因子
+        trigger_factors = self._collect_trigger_factors(progress, assessment_result)
+        
         # 如果有评估结果，根据结果决定路径调整
         if assessment_result:
-            decision = self._make_path_decision(progress, assessment_result)
+            decision = self._make_path_decision(trigger_factors)
         else:
             # 没有评估结果，保持当前通道继续下一节点
             decision = PathDecision.KEEP
@@ -431,8 +521,8 @@ class LearningPathService:
             next_node_id = self._get_next_node(current_node_id, progress.completed_nodes)
         
         # 生成推荐理由
-        reasoning, trigger_factors = self._generate_recommendation_reasoning(
-            progress, assessment_result, decision
+        reasoning = self._generate_recommendation_reasoning(
+            progress, trigger_factors, decision
         )
         
         # 生成备选方案
@@ -444,7 +534,7 @@ class LearningPathService:
         # 估算完成时间
         estimated_time = self._estimate_completion_time(next_node_id, recommended_channel)
         
-        recommendation = PathRecommendation(
+        fields = dict(
             student_id=student_id,
             recommended_channel=recommended_channel,
             next_node_id=next_node_id,
@@ -455,28 +545,64 @@ class LearningPathService:
             scaffold_resources=scaffold_resources,
             estimated_completion_time=estimated_time
         )
+        recommendation = PathRecommendation(**fields)
+        
+        if cache_key is not None:
+            self._recommendation_cache[cache_key] = fields
+            if len(self._recommendation_cache) > _RECOMMENDATION_CACHE_SIZE:
+                del self._recommendation_cache[next(iter(self._recommendation_cache))]
         
-        logger.info(f"📚 路径推荐已生成: {student_id}, 推荐: {next_node_id}({recommended_channel.value}), 决策: {decision.value}")
+        logger.info("📚 路径推荐已生成: %s, 推荐: %s(%s), 决策: %s", student_id, next_node_id, recommended_channel.value, decision.value)
         return recommendation
     
-    def _make_path_decision(
-        self, 
-        progress: StudentPathProgress, 
-        assessment_result: Dict[str, Any]
-    ) -> PathDecision:
-        """基于评估结果做出路径决策"""
+    async def recommend_batch(
+        self,
+        student_ids: List[str],
+        assessment_results: Optional[Dict[str, Dict[str, Any]]] = None
+    ) -> List[PathRecommendation]:
+        """
+        批量推荐下一步学习路径
+        
+        各学生的推荐通过 asyncio.gather 并发调度，返回结果与 student_ids 顺序一致
+        """
+        assessment_results = assessment_results or {}
+        return await asyncio.gather(*(
+            self.recommend_next_step(student_id, assessment_results.get(student_id))
+            for student_id in student_ids
+        ))
+    
+    def _collect_trigger_factors(
+        self,
+        progress: StudentPathProgress,
+        assessment_result: Optional[Dict[str, Any]]
+    ) -> Dict[str, Any]:
+        """收集路径决策的触发因子"""
         
-        overall_score = assessment_result.get("overall_score", 0)
-        mastery = overall_score / 100.0  # 转换为0-1范围
+        trigger_factors = {
+            "current_node": progress.current_node_id,
+            "current_channel": progress.current_channel.value,
+            "frustration_level": progress.frustration_level,
+            "retry_count": progress.retry_counts.get(progress.current_node_id, 0)
+        }
         
-        # 更新掌握度和挫败感
-        frustration = progress.frustration_level
-        retry_count = progress.retry_counts.get(progress.current_node_id, 0)
+        if assessment_result:
+            overall_score = assessment_result.get("overall_score", 0)
+            trigger_factors["overall_score"] = overall_score
+            trigger_factors["mastery_level"] = overall_score / 100.0  # 转换为0-1范围
+        
+        return trigger_factors
+    
+    def _make_path_decision(self, trigger_factors: Dict[str, Any]) -> PathDecision:
+        """基于评估结果的触发因子做出路径决策"""
+        
+        mastery = trigger_factors["mastery_level"]
+        frustration = trigger_factors["frustration_level"]
+        retry_count = trigger_factors["retry_count"]
         
         # 应用决策逻辑
-        if mastery > 0.85 and frustration < 0.2:
+        if mastery > _UPGRADE_MASTERY and frustration < _UPGRADE_MAX_FRUSTRATION:
             return PathDecision.UPGRADE  # 升级通道
-        elif mastery < 0.60 or retry_count >= 3:
+        elif mastery < _DOWNGRADE_MASTERY or retry_count >= _DOWNGRADE_RETRY_COUNT:
             return PathDecision.DOWNGRADE  # 降级并提供脚手架
         else:
             return PathDecision.KEEP  # 保持当前通道
@@ -487,69 +613,38 @@ class LearningPathService:
         decision: PathDecision
     ) -> Channel:
         """根据决策确定推荐通道"""
-        
-        if decision == PathDecision.UPGRADE:
-            if current_channel == Channel.A:
-                return Channel.B
-            elif current_channel == Channel.B:
-                return Channel.C
-            else:
-                return Channel.C  # 已经是最高通道
-        elif decision == PathDecision.DOWNGRADE:
-            if current_channel == Channel.C:
-                return Channel.B
-            elif current_channel == Channel.B:
-                return Channel.A
-            else:
-                return Channel.A  # 已经是最低通道
-        else:
+        transitions = _CHANNEL_TRANSITIONS.get(decision)
+        if transitions is None:
             return current_channel  # 保持当前通道
+        return transitions[current_channel]
     
     def _get_next_node(self, current_node_id: str, completed_nodes: List[str]) -> str:
         """获取下一个学习节点"""
-        # 从配置中获取节点序列
-        node_sequence = []
-        for path in self.learning_paths.values():
-            for node in sorted(path.nodes, key=lambda x: x.order):
-                node_sequence.append(node.id)
-            break  # 只取第一个路径的节点序列
+        # 节点序列在加载配置时已按顺序预先计算
+        node_sequence = self._node_sequence
         
         if not node_sequence:
             # 配置异常：没有任何节点
             raise ValueError("学习路径未包含任何节点，无法计算下一个节点")
         
-        try:
-            current_index = node_sequence.index(current_node_id)
-            if current_index < len(node_sequence) - 1:
-                return node_sequence[current_index + 1]
-            else:
-                return current_node_id  # 已经是最后一个节点
-        except ValueError:
-            # 当前节点不在序列中，返回第一个未完成的节点
-            for node_id in node_sequence:
-                if node_id not in completed_nodes:
-                    return node_id
-            return node_sequence[0] if node_sequence else current_node_id
+        if current_node_id in self._node_positions:
+            # 已经是最后一个节点时返回节点本身
+            return self._next_node_of.get(current_node_id, current_node_id)
+        
+        # 当前节点不在序列中，返回第一个未完成的节点
+        completed = set(completed_nodes)
+        for node_id in node_sequence:
+            if node_id not in completed:
+                return node_id
+        return node_sequence[0]
     
     def _generate_recommendation_reasoning(
         self,
         progress: StudentPathProgress,
-        assessment_result: Optional[Dict[str, Any]],
+        trigger_factors: Dict[str, Any],
         decision: PathDecision
-    ) -> tuple[str, Dict[str, Any]]:
-        """生成推荐理由和触发因子"""
-        
-        trigger_factors = {
-            "current_node": progress.current_node_id,
-            "current_channel": progress.current_channel.value,
-            "frustration_level": progress.frustration_level,
-            "retry_count": progress.retry_counts.get(progress.current_node_id, 0)
-        }
-        
-        if assessment_result:
-            overall_score = assessment_result.get("overall_score", 0)
-            trigger_factors["overall_score"] = overall_score
-            trigger_factors["mastery_level"] = overall_score / 100.0
+    ) -> str:
+        """根据触发因子生成推荐理由"""
         
         # 生成推荐理由
         if decision == PathDecision.UPGRADE:
@@ -560,7 +655,7 @@ class LearningPathService:
         else:
             reasoning = f"已通过当前节点（评分: {trigger_factors.get('overall_score', 0)}分）。建议保持当前难度通道继续学习下一个节点，稳步推进课程进度。"
         
-        return reasoning, trigger_factors
+        return reasoning
     
     def _generate_alternative_options(
         self, 
@@ -569,48 +664,34 @@ class LearningPathService:
     ) -> List[Dict[str, Any]]:
         """生成备选学习方案"""
         
-        alternatives = []
+        channel_options = self._channel_options.get(current_node_id)
+        if channel_options is None:
+            raise ValueError(f"未找到节点的预估时长: {current_node_id}")
         
-        # 通道切换选项
-        for channel in [Channel.A, Channel.B, Channel.C]:
-            if channel != progress.current_channel:
-                alternatives.append({
-                    "option": f"切换到{channel.value}通道",
-                    "description": self._get_channel_description(channel),
-                    "estimated_hours": self._get_estimated_hours_for_node(current_node_id)[channel],
-                    "difficulty": self._get_difficulty_level_for_node(current_node_id)[channel]
-                })
+        # 通道切换选项（加载配置时预先生成，返回副本避免调用方修改）
+        alternatives = [
+            dict(channel_options[channel])
+            for channel in Channel
+            if channel != progress.current_channel
+        ]
         
         # 补救学习选项
-        alternatives.append({
-            "option": "补救学习路径",
-            "description": "通过微课和引导题强化薄弱环节",
-            "estimated_hours": 4,
-            "difficulty": 2
-        })
+        alternatives.append(dict(_REMEDY_ALTERNATIVE))
         
         return alternatives
     
     def _get_channel_description(self, channel: Channel) -> str:
         """获取通道描述"""
-        descriptions = {
-            Channel.A: "基础保底通道，注重基础概念掌握和实践入门",
-            Channel.B: "标准实践通道，涵盖主流技能和完整项目体验",
-            Channel.C: "挑战拓展通道，追求工程化实践和高阶技能"
-        }
-        return descriptions[channel]
+        return _CHANNEL_DESCRIPTIONS[channel]
     
     def _generate_scaffold_resources(self, decision: PathDecision, node_id: str) -> List[str]:
         """生成脚手架资源"""
         
         if decision == PathDecision.DOWNGRADE:
-            remedy_resources = self._get_remedy_resources(node_id)
-            scaffold_resources = []
-            
-            for category, resources in remedy_resources.items():
-                scaffold_resources.extend(resources)
-            
-            return scaffold_resources
+            resources = self._flat_remedy_resources.get(node_id)
+            if resources is None:
+                raise ValueError(f"未找到节点的补救资源: {node_id}")
+            return list(resources)
         
         return []
     
@@ -628,53 +709,41 @@ class LearningPathService:
     ):
         """更新学生学习进度"""
         
-        db_data = ProgressRepository.get_student_progress(student_id)
+        db_data = await asyncio.to_thread(ProgressRepository.get_student_progress, student_id)
         if not db_data:
-            raise ValueError(f"学生学习进度不存在: {student_id}")
-        p = db_data["progress"]
-        progress = StudentPathProgress(
-            student_id=student_id,
-            current_node_id=p["current_node_id"],
-            current_channel=Channel(p["current_channel"]),
-            node_statuses={},
-            completed_nodes=[n["node_id"] for n in db_data["nodes"] if n["status"] == NodeStatus.COMPLETED.value],
-            completed_channels={
-                n["node_id"]: (n["used_channel"] or "") for n in db_data["nodes"] if n["status"] == NodeStatus.COMPLETED.value
-            },
-            total_study_hours=float(p["total_study_hours"]),
-            mastery_scores={},
-            frustration_level=float(p["frustration_level"]),
-            retry_counts={},
-            started_at=p["started_at"],
-            last_activity_at=p["last_activity_at"],
-            updated_at=p["updated_at"],
-        )
+            raise StudentProgressNotFoundError(student_id)
+        progress = self._materialize_progress(student_id, db_data)
+        
+        # 本次更新中当前通道不变，已完成列表原地修改，绑定为局部变量
+        current_channel = progress.current_channel
+        completed_nodes = progress.completed_nodes
         
         # 更新节点状态
         progress.node_statuses[node_id] = status
-        progress.last_activity_at = datetime.now()
-        progress.updated_at = datetime.now()
+        now = datetime.now()
+        progress.last_activity_at = now
+        progress.updated_at = now
         
         # 如果节点失败（DOWNGRADE情况），需要将其从已完成列表中移除
         if status == NodeStatus.FAILED:
-            if node_id in progress.completed_nodes:
-                progress.completed_nodes.remove(node_id)
-                logger.info(f"📚 节点失败，从已完成列表中移除: {node_id}")
+            if node_id in completed_nodes:
+                completed_nodes.remove(node_id)
+                logger.info("📚 节点失败，从已完成列表中移除: %s", node_id)
         
         # 如果节点完成，更新完成列表
         if status == NodeStatus.COMPLETED:
-            if node_id not in progress.completed_nodes:
-                progress.completed_nodes.append(node_id)
+            if node_id not in completed_nodes:
+                completed_nodes.append(node_id)
                 
                 # 记录完成时使用的通道
-                progress.completed_channels[node_id] = progress.current_channel.value
+                progress.completed_channels[node_id] = current_channel.value
                 
                 # 计算并累加该节点的学习时长
                 estimated_hours = self._get_estimated_hours_for_node(node_id)
-                node_hours = estimated_hours.get(progress.current_channel, 0)
+                node_hours = estimated_hours.get(current_channel, 0)
                 progress.total_study_hours += node_hours
                 
-                logger.info(f"📚 节点完成，累计学习时长: {node_id} -> +{node_hours}小时，总计: {progress.total_study_hours}小时")
+                logger.info("📚 节点完成，累计学习时长: %s -> +%s小时，总计: %s小时", node_id, node_hours, progress.total_study_hours)
             
             # 根据评估结果决定是否进入下一节点
             # 如果当前节点通过且未要求降级，则进入下一节点
@@ -684,12 +753,15 @@ class LearningPathService:
             if assessment_result and assessment_result.get("overall_score", 0) < 60:
                 # 如果分数低于60分，可能是降级决策，需要检查
                 # 这个逻辑会在 recommend_next_step 中处理，这里先判定不进入下一节点
-                logger.info(f"📚 节点完成但分数低于60，等待路径推荐来决定是否进入下一节点")
+                logger.info("📚 节点完成但分数低于60，等待路径推荐来决定是否进入下一节点")
                 should_proceed_to_next = False
             
             if should_proceed_to_next:
-                # 解锁下一个节点
-                next_node_id = self._get_next_node(node_id, progress.completed_nodes)
+                # 解锁下一个节点（序列内的节点直接查后继，最后一个节点没有后继）
+                if node_id in self._node_positions:
+                    next_node_id = self._next_node_of.get(node_id)
+                else:
+                    next_node_id = self._get_next_node(node_id, completed_nodes)
                 if next_node_id and next_node_id != node_id:
                     progress.node_statuses[next_node_id] = NodeStatus.AVAILABLE
                     progress.current_node_id = next_node_id
@@ -706,68 +778,50 @@ class LearningPathService:
             else:
                 progress.frustration_level = max(0.0, progress.frustration_level - 0.05)
         
-        # 持久化到数据库
-        ProgressRepository.upsert_student_progress(
+        # 持久化到数据库：全局进度和本节点状态在同一事务中写入
+        await asyncio.to_thread(
+            ProgressRepository.save_progress,
             student_id=student_id,
             current_node_id=progress.current_node_id,
-            current_channel=progress.current_channel,
+            current_channel=current_channel,
             total_study_hours=progress.total_study_hours,
             frustration_level=progress.frustration_level,
             started_at=progress.started_at,
             last_activity_at=progress.last_activity_at,
-        )
-        ProgressRepository.upsert_node_progress(
-            student_id=student_id,
-            node_id=node_id,
-            status=status,
-            # 无论完成还是失败，都需要记录使用的通道
-            used_channel=progress.current_channel if status in [NodeStatus.COMPLETED, NodeStatus.FAILED] else None,
-            score=(assessment_result.get("overall_score") if assessment_result else None),
-            attempt_count=progress.retry_counts.get(node_id, 0),
-            started_at=None,
-            completed_at=(datetime.now() if status == NodeStatus.COMPLETED else None),
+            nodes=[{
+                "node_id": node_id,
+                "status": status,
+                # 无论完成还是失败，都需要记录使用的通道
+                "used_channel": current_channel if status in [NodeStatus.COMPLETED, NodeStatus.FAILED] else None,
+                "score": (assessment_result.get("overall_score") if assessment_result else None),
+                "attempt_count": progress.retry_counts.get(node_id, 0),
+                "started_at": None,
+                "completed_at": (now if status == NodeStatus.COMPLETED else None),
+            }],
         )
         
-        logger.info(f"📚 学生进度已更新: {student_id}, 节点: {node_id}, 状态: {status.value}")
+        logger.info("📚 学生进度已更新: %s, 节点: %s, 状态: %s", student_id, node_id, status.value)
     
-    def _recalculate_total_study_hours(self, progress: StudentPathProgress) -> None:
-        """重新计算累计学习时长"""
-        total_hours = 0.0
+    def _materialize_progress(self, student_id: str, db_data: Dict[str, Any]) -> StudentPathProgress:
+        """由数据库查询结果构建学生学习进度对象"""
+        p = db_data["progress"]
         
-        for node_id in progress.completed_nodes:
-            # 获取该节点的预估时长
-            estimated_hours = self._get_estimated_hours_for_node(node_id)
-            
-            # 使用当前通道计算时长（如果历史记录中没有通道信息，默认使用B通道）
-            if hasattr(progress, 'node_channels') and progress.node_channels.get(node_id):
-                channel = progress.node_channels[node_id]
-            else:
-                # 如果没有历史通道记录，根据节点完成时间推测使用B通道
-                channel = Channel.B
-            
-            node_hours = estimated_hours.get(channel, estimated_hours.get(Channel.B, 0))
-            total_hours += node_hours
-            
-            logger.debug(f"📚 重新计算: {node_id} ({channel.value}通道) -> {node_hours}小时")
+        # 一次遍历节点记录，同时收集已完成节点及其完成通道
+        completed_nodes = []
+        completed_channels = {}
+        for n in db_data["nodes"]:
+            if n["status"] == _COMPLETED_STATUS:
+                node_id = n["node_id"]
+                completed_nodes.append(node_id)
+                completed_channels[node_id] = n["used_channel"] or ""
         
-        progress.total_study_hours = total_hours
-        logger.info(f"📚 重新计算累计学习时长: {total_hours}小时")
-    
-    def get_student_progress(self, student_id: str) -> Optional[StudentPathProgress]:
-        """获取学生学习进度（从数据库）"""
-        db_data = ProgressRepository.get_student_progress(student_id)
-        if not db_data:
-            return None
-        p = db_data["progress"]
-        progress = StudentPathProgress(
+        return StudentPathProgress(
             student_id=student_id,
             current_node_id=p["current_node_id"],
-            current_channel=Channel(p["current_channel"]),
-            node_statuses={},
-            completed_nodes=[n["node_id"] for n in db_data["nodes"] if n["status"] == NodeStatus.COMPLETED.value],
-            completed_channels={
-                n["node_id"]: (n["used_channel"] or "") for n in db_data["nodes"] if n["status"] == NodeStatus.COMPLETED.value
-            },
+            current_channel=_CHANNEL_BY_VALUE[p["current_channel"]],
+            node_statuses={},  # 如有需要可从 nodes 填充
+            completed_nodes=completed_nodes,
+            completed_channels=completed_channels,
             total_study_hours=float(p["total_study_hours"]),
             mastery_scores={},
             frustration_level=float(p["frustration_level"]),
@@ -776,6 +830,29 @@ class LearningPathService:
             last_activity_at=p["last_activity_at"],
             updated_at=p["updated_at"],
         )
+    
+    def _recalculate_total_study_hours(self, progress: StudentPathProgress) -> None:
+        """重新计算累计学习时长"""
+        # 历史记录中没有可靠的通道信息，统一按B通道的预估时长计算
+        node_hours = [
+            self._get_estimated_hours_for_node(node_id).get(Channel.B, 0)
+            for node_id in progress.completed_nodes
+        ]
+        total_hours = float(sum(node_hours))
+        
+        if logger.isEnabledFor(logging.DEBUG):
+            for node_id, hours in zip(progress.completed_nodes, node_hours):
+                logger.debug("📚 重新计算: %s (%s通道) -> %s小时", node_id, Channel.B.value, hours)
+        
+        progress.total_study_hours = total_hours
+        logger.info("📚 重新计算累计学习时长: %s小时", total_hours)
+    
+    def get_student_progress(self, student_id: str) -> Optional[StudentPathProgress]:
+        """获取学生学习进度（从数据库）"""
+        db_data = ProgressRepository.get_student_progress(student_id)
+        if not db_data:
+            return None
+        progress = self._materialize_progress(student_id, db_data)
         if progress.completed_nodes:
             self._recalculate_total_study_hours(progress)
         return progress
@@ -785,7 +862,10 @@ class LearningPathService:
         return self.learning_paths.get(path_id)
     
     def get_available_paths(self) -> List[Dict[str, Any]]:
-        """获取所有可用的学习路径"""
+        """获取所有可用的学习路径（路径加载后很少变化，结果缓存复用）"""
+        if self._paths_cache is not None:
+            return self._paths_cache
+        
         paths = []
         for path_id, path in self.learning_paths.items():
             paths.append({
@@ -797,15 +877,15 @@ class LearningPathService:
                 "prerequisites": path.prerequisites_knowledge,
                 "outcomes": path.learning_outcomes
             })
+        self._paths_cache = paths
         return paths
     
     def _get_node_name_from_id(self, node_id: str) -> str:
         """根据节点ID获取节点名称"""
-        for path in self.learning_paths.values():
-            for node in path.nodes:
-                if node.id == node_id:
-                    return node.name
-        return node_id  # 如果找不到，返回节点ID本身
+        node = self._nodes_by_id.get(node_id)
+        if node is None:
+            return node_id  # 如果找不到，返回节点ID本身
+        return node.name
     
     def _load_student_progresses(self):
         """兼容函数（不再使用文件加载）"""
@@ -835,15 +915,15 @@ class LearningPathService:
             }
             return data
         except Exception as e:
-            logger.error(f"📚 序列化学习进度失败: {str(e)}")
+            logger.error("📚 序列化学习进度失败: %s", e)
             return {}
     
     def _deserialize_progress(self, data: Dict[str, Any]) -> Optional[StudentPathProgress]:
         """反序列化学习进度对象"""
         try:
             # 转换枚举值
-            current_channel = Channel(data["current_channel"])
-            node_statuses = {k: NodeStatus(v) for k, v in data["node_statuses"].items()}
+            current_channel = _CHANNEL_BY_VALUE[data["current_channel"]]
+            node_statuses = {k: _NODE_STATUS_BY_VALUE[v] for k, v in data["node_statuses"].items()}
             
             # 转换时间字段
             started_at = datetime.fromisoformat(data["started_at"])
@@ -867,10 +947,32 @@ class LearningPathService:
             )
             return progress
         except Exception as e:
-            logger.error(f"📚 反序列化学习进度失败: {str(e)}")
+            logger.error("📚 反序列化学习进度失败: %s", e)
             return None
 
 
 class LearningPathServiceError(Exception):
     """学习路径服务错误"""
     pass
+
+
+class StudentProgressNotFoundError(LearningPathServiceError, ValueError):
+    """
+    学生学习进度不存在
+    
+    只保存学生ID，错误信息在需要展示时才格式化；
+    同时继承 ValueError，兼容按 ValueError 捕获的既有调用方
+    """
+    
+    def __init__(self, student_id: str):
+        super().__init__(student_id)
+        self.student_id = student_id
+    
+    def __str__(self) -> str:
+        return f"学生学习进度不存在: {self.student_id}"
+
+
+# 创建全局单例
+def get_learning_path_service() -> LearningPathService:
+    """获取学习路径服务单例（实例由 Singleton 元类维护）"""
+    return LearningPathService()
@@ -5,12 +5,193 @@ from typing import Dict, Any, List, Optional, Tuple
 from datetime import datetime, timedelta
 import numpy as np
 from dataclasses import asdict
+from functools import lru_cache
 
 from ..models.learning_path import Channel, PathDecision, NodeStatus
 from ..models.student import StudentProfile, LearningLevel, LearningStyle
 
 logger = logging.getLogger(__name__)
 
+# 各学习水平的初始通道
+_INITIAL_CHANNELS = {
+    LearningLevel.L0: Channel.A,  # 零基础 -> 基础保底
+    LearningLevel.L1: Channel.B,  # 初级 -> 标准实践
+    LearningLevel.L2: Channel.B,  # 中级 -> 标准实践
+    LearningLevel.L3: Channel.C   # 高级 -> 挑战拓展
+}
+
+# 各节点的基础学习时间估算（以周为单位）
+_BASE_TIMELINE_WEEKS = {
+    "api_calling": 1,
+    "model_deployment": 1.5,
+    "no_code_ai": 1,
+    "rag_system": 2,
+    "ui_design": 1.5,
+    "frontend_dev": 2.5,
+    "backend_dev": 3
+}
+
+# 各学习风格的学习策略
+_STYLE_STRATEGIES = {
+    LearningStyle.EXAMPLES_FIRST: {
+        "approach": "示例驱动学习",
+        "recommendations": [
+            "优先查看代码示例和案例",
+            "通过对比学习理解概念",
+            "重点关注实践操作步骤"
+        ],
+        "resource_preference": "案例库和示例代码"
+    },
+    LearningStyle.THEORY_FIRST: {
+        "approach": "理论先导学习",
+        "recommendations": [
+            "先理解原理再进行实践",
+            "深入学习底层概念和机制",
+            "注重知识体系的完整性"
+        ],
+        "resource_preference": "理论文档和技术原理"
+    },
+    LearningStyle.HANDS_ON: {
+        "approach": "实践导向学习",
+        "recommendations": [
+            "直接动手操作，在实践中学习",
+            "通过试错快速获得经验",
+            "重视项目实战和实际应用"
+        ],
+        "resource_preference": "实验环境和项目模板"
+    },
+    LearningStyle.VISUAL: {
+        "approach": "可视化学习",
+        "recommendations": [
+            "使用图表和流程图理解概念",
+            "关注界面设计和用户体验",
+            "通过视觉化工具辅助学习"
+        ],
+        "resource_preference": "视频教程和图形化工具"
+    }
+}
+
+# 学习监控检查点
+_MONITORING_CHECKPOINTS = (
+    {
+        "checkpoint": "第1周结束",
+        "focus": "API调用基础掌握情况",
+        "metrics": ["完成率", "正确率", "学习时间"]
+    },
+    {
+        "checkpoint": "第3周结束", 
+        "focus": "模型部署和无代码应用进展",
+        "metrics": ["项目质量", "概念理解", "实践能力"]
+    },
+    {
+        "checkpoint": "第6周结束",
+        "focus": "RAG系统和UI设计能力",
+        "metrics": ["系统复杂度", "设计质量", "用户反馈"]
+    },
+    {
+        "checkpoint": "课程结束",
+        "focus": "完整项目交付能力",
+        "metrics": ["项目完整度", "技术深度", "创新程度"]
+    }
+)
+
+# 薄弱技能分类
+_SKILL_CATEGORIES = {
+    "programming": ("Python基础", "编程逻辑", "调试技能"),
+    "tools": ("Git", "Docker", "IDE使用"),
+    "concepts": ("HTTP协议", "API设计", "数据库原理"),
+    "frameworks": ("Web框架", "前端框架", "AI框架")
+}
+
+# 技能到所属分类的反向索引
+_SKILL_TO_CATEGORY = {
+    skill: category
+    for category, skills in _SKILL_CATEGORIES.items()
+    for skill in skills
+}
+
+# 薄弱技能对应的补救资源
+_SKILL_RESOURCES = {
+    "Python基础": ("Python入门课程", "基础语法练习"),
+    "Git": ("Git基础教程", "版本控制实践"),
+    "HTTP协议": ("HTTP协议详解", "Web基础概念"),
+    "调试技能": ("调试技巧课程", "错误定位方法")
+}
+
+# 序列长度达到该值时才用 numpy 计算统计量，更短的序列直接用 Python 计算
+_NUMPY_MIN_SIZE = 32
+
+# 兴趣方向对应的课程节点
+_INTEREST_NODES = {
+    "移动端": ("ui_design", "frontend_dev"),
+    "Agent": ("api_calling", "no_code_ai", "backend_dev"),
+    "RAG": ("rag_system", "backend_dev"),
+    "机器学习": ("model_deployment", "rag_system"),
+    "Web开发": ("frontend_dev", "backend_dev", "ui_design"),
+    "数据分析": ("api_calling", "rag_system")
+}
+
+
+def _mean_and_std(values: List[float]) -> Tuple[float, float]:
+    """
+    计算均值和总体标准差
+    
+    评估得分、每周学时等序列通常只有几到十几个元素，此时 numpy 的调用开销
+    比计算本身还大，数量少于 _NUMPY_MIN_SIZE 时直接用 Python 计算
+    """
+    count = len(values)
+    if count < _NUMPY_MIN_SIZE:
+        mean = sum(values) / count
+        return mean, (sum((value - mean) ** 2 for value in values) / count) ** 0.5
+    
+    array = np.asarray(values, dtype=np.float64)
+    return float(array.mean()), float(array.std())
+
+
+def _trend_slope(values: List[float], mean: float) -> float:
+    """一次线性拟合的斜率：cov(x, y) / var(x)，x 为序号，无需走 polyfit 的最小二乘求解"""
+    count = len(values)
+    center = (count - 1) / 2
+    if count < _NUMPY_MIN_SIZE:
+        covariance = sum((index - center) * (value - mean) for index, value in enumerate(values))
+        variance = sum((index - center) ** 2 for index in range(count))
+        return covariance / variance
+    
+    offsets = np.arange(count) - center
+    return float((offsets * (np.asarray(values, dtype=np.float64) - mean)).sum() / (offsets ** 2).sum())
+
+
+@lru_cache(maxsize=64)
+def _pace_for_budget(time_budget: int) -> Tuple[str, float, str]:
+    """
+    根据每周学时确定学习节奏
+    
+    结果只取决于每周学时，按学时缓存；只缓存不可变的元组，调用方每次拿到新的字典
+    """
+    
+    # 标准时间预算为每周6小时
+    standard_budget = 6
+    pace_ratio = time_budget / standard_budget
+    
+    if pace_ratio <= 0.5:
+        pace_level = "慢速"
+        timeline_multiplier = 2.0
+        suggestion = "建议延长学习周期，重点关注基础掌握"
+    elif pace_ratio <= 0.8:
+        pace_level = "标准"  
+        timeline_multiplier = 1.2
+        suggestion = "按标准进度学习，适当增加练习时间"
+    elif pace_ratio <= 1.2:
+        pace_level = "正常"
+        timeline_multiplier = 1.0
+        suggestion = "按正常进度推进课程"
+    else:
+        pace_level = "快速"
+        timeline_multiplier = 0.8
+        suggestion = "可以适当加快进度，增加挑战性内容"
+    
+    return pace_level, timeline_multiplier, suggestion
+
 
 class PathRecommendationEngine:
     """
@@ -51,7 +232,8 @@ class PathRecommendationEngine:
     async def recommend_initial_path(
         self, 
         student_profile: StudentProfile,
-        diagnostic_results: Dict[str, Any]
+        diagnostic_results: Dict[str, Any],
+        now: Optional[datetime] = None
     ) -> Dict[str, Any]:
         """
         为新学生推荐初始学习路径
@@ -59,11 +241,15 @@ class PathRecommendationEngine:
         Args:
             student_profile: 学生画像
             diagnostic_results: 入学诊断结果
+            now: 推荐生成时间，批量生成时由调用方传入同一时刻，默认取当前时间
             
         Returns:
             初始路径推荐结果
         """
         
+        if now is None:
+            now = datetime.now()
+        
         # 基于学习水平确定起始通道
         initial_channel = self._determine_initial_channel(student_profile.level)
         
@@ -95,41 +281,49 @@ class PathRecommendationEngine:
                 "interest_priorities": interest_focus
             },
             "estimated_timeline": self._estimate_course_timeline(
-                initial_channel, pace_adjustment
+                initial_channel, pace_adjustment, now
             ),
             "recommended_resources": self._get_initial_resources(student_profile),
             "monitoring_points": self._define_monitoring_checkpoints(),
-            "created_at": datetime.now().isoformat()
+            "created_at": now.isoformat()
         }
         
         logger.info(f"🤖 初始路径推荐已生成: {student_profile.student_id} -> {initial_channel.value}通道")
         return recommendation
     
+    async def recommend_initial_paths(
+        self,
+        students: List[Tuple[StudentProfile, Dict[str, Any]]],
+        now: Optional[datetime] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        批量为新学生推荐初始学习路径（如整班导入）
+        
+        Args:
+            students: (学生画像, 入学诊断结果) 列表
+            now: 推荐生成时间，默认取当前时间，整批推荐共用同一时刻
+            
+        Returns:
+            与 students 顺序一致的初始路径推荐结果列表
+        """
+        if now is None:
+            now = datetime.now()
+        
+        return [
+            await self.recommend_initial_path(profile, diagnostic_results, now)
+            for profile, diagnostic_results in students
+        ]
+    
     def _determine_initial_channel(self, level: LearningLevel) -> Channel:
         """根据学习水平确定初始通道"""
-        channel_map = {
-            LearningLevel.L0: Channel.A,  # 零基础 -> 基础保底
-            LearningLevel.L1: Channel.B,  # 初级 -> 标准实践 
-            LearningLevel.L2: Channel.B,  # 中级 -> 标准实践
-            LearningLevel.L3: Channel.C   # 高级 -> 挑战拓展
-        }
-        return channel_map.get(level, Channel.B)
+        return _INITIAL_CHANNELS.get(level, Channel.B)
     
     def _analyze_weak_skills(self, weak_skills: List[str]) -> Dict[str, Any]:
         """分析薄弱技能，制定强化策略"""
         
-        # 将薄弱技能分类
-        skill_categories = {
-            "programming": ["Python基础", "编程逻辑", "调试技能"],
-            "tools": ["Git", "Docker", "IDE使用"],
-            "concepts": ["HTTP协议", "API设计", "数据库原理"],
-            "frameworks": ["Web框架", "前端框架", "AI框架"]
-        }
-        
-        weak_categories = []
-        for category, skills in skill_categories.items():
-            if any(skill in weak_skills for skill in skills):
-                weak_categories.append(category)
+        # 将薄弱技能分类（按 _SKILL_CATEGORIES 中的类别顺序输出）
+        matched = {_SKILL_TO_CATEGORY[skill] for skill in weak_skills if skill in _SKILL_TO_CATEGORY}
+        weak_categories = [category for category in _SKILL_CATEGORIES if category in matched]
         
         # 基于薄弱技能类型制定策略
         strategy = {
@@ -143,44 +337,19 @@ class PathRecommendationEngine:
     
     def _map_skills_to_resources(self, weak_skills: List[str]) -> List[str]:
         """将薄弱技能映射到补救资源"""
-        resource_map = {
-            "Python基础": ["Python入门课程", "基础语法练习"],
-            "Git": ["Git基础教程", "版本控制实践"],
-            "HTTP协议": ["HTTP协议详解", "Web基础概念"],
-            "调试技能": ["调试技巧课程", "错误定位方法"]
-        }
-        
-        resources = []
+        resources = set()  # 去重
         for skill in weak_skills:
-            if skill in resource_map:
-                resources.extend(resource_map[skill])
+            if skill in _SKILL_RESOURCES:
+                resources.update(_SKILL_RESOURCES[skill])
         
-        return list(set(resources))  # 去重
+        return list(resources)
     
-    def _calculate_pace_adjustment(self, time_budget: int) -> Dict[str, Any]:
+    @staticmethod
+    def _calculate_pace_adjustment(time_budget: int) -> Dict[str, Any]:
         """根据时间预算计算学习节奏调整"""
         
-        # 标准时间预算为每周6小时
-        standard_budget = 6
-        pace_ratio = time_budget / standard_budget
-        
-        if pace_ratio <= 0.5:
-            pace_level = "慢速"
-            timeline_multiplier = 2.0
-            suggestion = "建议延长学习周期，重点关注基础掌握"
-        elif pace_ratio <= 0.8:
-            pace_level = "标准"  
-            timeline_multiplier = 1.2
-            suggestion = "按标准进度学习，适当增加练习时间"
-        elif pace_ratio <= 1.2:
-            pace_level = "正常"
-            timeline_multiplier = 1.0
-            suggestion = "按正常进度推进课程"
-        else:
-            pace_level = "快速"
-            timeline_multiplier = 0.8
-            suggestion = "可以适当加快进度，增加挑战性内容"
-        
+        time_budget = int(time_budget)
+        pace_level, timeline_multiplier, suggestion = _pace_for_budget(time_budget)
         return {
             "pace_level": pace_level,
             "timeline_multiplier": timeline_multiplier,
@@ -189,71 +358,17 @@ class PathRecommendationEngine:
         }
     
     def _get_style_based_recommendations(self, style: LearningStyle) -> Dict[str, Any]:
-        """根据学习风格提供个性化建议"""
-        
-        style_strategies = {
-            LearningStyle.EXAMPLES_FIRST: {
-                "approach": "示例驱动学习",
-                "recommendations": [
-                    "优先查看代码示例和案例",
-                    "通过对比学习理解概念",
-                    "重点关注实践操作步骤"
-                ],
-                "resource_preference": "案例库和示例代码"
-            },
-            LearningStyle.THEORY_FIRST: {
-                "approach": "理论先导学习",
-                "recommendations": [
-                    "先理解原理再进行实践",
-                    "深入学习底层概念和机制",
-                    "注重知识体系的完整性"
-                ],
-                "resource_preference": "理论文档和技术原理"
-            },
-            LearningStyle.HANDS_ON: {
-                "approach": "实践导向学习",
-                "recommendations": [
-                    "直接动手操作，在实践中学习",
-                    "通过试错快速获得经验",
-                    "重视项目实战和实际应用"
-                ],
-                "resource_preference": "实验环境和项目模板"
-            },
-            LearningStyle.VISUAL: {
-                "approach": "可视化学习",
-                "recommendations": [
-                    "使用图表和流程图理解概念",
-                    "关注界面设计和用户体验",
-                    "通过视觉化工具辅助学习"
-                ],
-                "resource_preference": "视频教程和图形化工具"
-            }
-        }
-        
-        return style_strategies.get(style, style_strategies[LearningStyle.EXAMPLES_FIRST])
+        """根据学习风格提供个性化建议（返回共享的策略字典，调用方只读不改）"""
+        return _STYLE_STRATEGIES.get(style, _STYLE_STRATEGIES[LearningStyle.EXAMPLES_FIRST])
     
     def _analyze_interest_focus(self, interests: List[str]) -> Dict[str, Any]:
         """分析兴趣点，确定学习重点"""
         
-        # 将兴趣映射到课程节点
-        interest_node_map = {
-            "移动端": ["ui_design", "frontend_dev"],
-            "Agent": ["api_calling", "no_code_ai", "backend_dev"],
-            "RAG": ["rag_system", "backend_dev"],
-            "机器学习": ["model_deployment", "rag_system"],
-            "Web开发": ["frontend_dev", "backend_dev", "ui_design"],
-            "数据分析": ["api_calling", "rag_system"]
-        }
-        
-        priority_nodes = []
-        for interest in interests:
-            if interest in interest_node_map:
-                priority_nodes.extend(interest_node_map[interest])
-        
-        # 统计节点优先级
+        # 将兴趣映射到课程节点并统计节点优先级
         node_priorities = {}
-        for node in priority_nodes:
-            node_priorities[node] = node_priorities.get(node, 0) + 1
+        for interest in interests:
+            for node in _INTEREST_NODES.get(interest, ()):
+                node_priorities[node] = node_priorities.get(node, 0) + 1
         
         # 排序获得最高优先级的节点
         sorted_priorities = sorted(
@@ -282,29 +397,19 @@ class PathRecommendationEngine:
     def _estimate_course_timeline(
         self, 
         initial_channel: Channel, 
-        pace_adjustment: Dict[str, Any]
+        pace_adjustment: Dict[str, Any],
+        now: datetime
     ) -> Dict[str, Any]:
-        """估算整个课程的学习时间线"""
-        
-        # 基础时间估算（以周为单位）
-        base_timeline = {
-            "api_calling": 1,
-            "model_deployment": 1.5,
-            "no_code_ai": 1,
-            "rag_system": 2,
-            "ui_design": 1.5,
-            "frontend_dev": 2.5,
-            "backend_dev": 3
-        }
+        """估算整个课程的学习时间线（预计完成日期从 now 起算）"""
         
-        # 根据通道调整时间
+        # 根据通道和学习节奏调整时间
         channel_multiplier = self.channel_difficulty_map[initial_channel]
         pace_multiplier = pace_adjustment["timeline_multiplier"]
         
         adjusted_timeline = {}
         total_weeks = 0
         
-        for node, weeks in base_timeline.items():
+        for node, weeks in _BASE_TIMELINE_WEEKS.items():
             adjusted_weeks = weeks * channel_multiplier * pace_multiplier
             adjusted_timeline[node] = round(adjusted_weeks, 1)
             total_weeks += adjusted_weeks
@@ -312,7 +417,7 @@ class PathRecommendationEngine:
         return {
             "node_timeline": adjusted_timeline,
             "total_weeks": round(total_weeks, 1),
-            "estimated_completion": (datetime.now() + timedelta(weeks=total_weeks)).strftime("%Y-%m-%d"),
+            "estimated_completion": (now + timedelta(weeks=total_weeks)).strftime("%Y-%m-%d"),
             "pace_level": pace_adjustment["pace_level"]
         }
     
@@ -348,35 +453,15 @@ class PathRecommendationEngine:
     
     def _define_monitoring_checkpoints(self) -> List[Dict[str, Any]]:
         """定义学习监控检查点"""
-        return [
-            {
-                "checkpoint": "第1周结束",
-                "focus": "API调用基础掌握情况",
-                "metrics": ["完成率", "正确率", "学习时间"]
-            },
-            {
-                "checkpoint": "第3周结束", 
-                "focus": "模型部署和无代码应用进展",
-                "metrics": ["项目质量", "概念理解", "实践能力"]
-            },
-            {
-                "checkpoint": "第6周结束",
-                "focus": "RAG系统和UI设计能力",
-                "metrics": ["系统复杂度", "设计质量", "用户反馈"]
-            },
-            {
-                "checkpoint": "课程结束",
-                "focus": "完整项目交付能力",
-                "metrics": ["项目完整度", "技术深度", "创新程度"]
-            }
-        ]
+        return list(_MONITORING_CHECKPOINTS)
     
     async def recommend_path_adjustment(
         self,
         student_id: str,
         current_progress: Dict[str, Any],
         recent_assessments: List[Dict[str, Any]],
-        behavioral_data: Optional[Dict[str, Any]] = None
+        behavioral_data: Optional[Dict[str, Any]] = None,
+        now: Optional[datetime] = None
     ) -> Dict[str, Any]:
         """
         基于学习进展推荐路径调整
@@ -386,6 +471,7 @@ class PathRecommendationEngine:
             current_progress: 当前学习进度
             recent_assessments: 最近的评估结果
             behavioral_data: 学习行为数据
+            now: 建议生成时间，批量生成时由调用方传入同一时刻，默认取当前时间
             
         Returns:
             路径调整建议
@@ -425,7 +511,7 @@ class PathRecommendationEngine:
             "reasoning": adjustment_decision["reasoning"],
             "expected_outcomes": adjustment_decision["expected_outcomes"],
             "monitoring_plan": self._create_monitoring_plan(adjustment_decision),
-            "created_at": datetime.now().isoformat()
+            "created_at": (now or datetime.now()).isoformat()
         }
         
         logger.info(f"🤖 路径调整建议已生成: {student_id} -> {adjustment_decision['type']}")
@@ -441,10 +527,11 @@ class PathRecommendationEngine:
             return {"trend": "insufficient_data", "average_score": 0, "consistency": 0}
         
         scores = [assessment.get("overall_score", 0) for assessment in recent_assessments]
+        average_score, score_std = _mean_and_std(scores)
         
         # 计算趋势
         if len(scores) >= 3:
-            recent_trend = np.polyfit(range(len(scores)), scores, 1)[0]
+            recent_trend = _trend_slope(scores, average_score)
             if recent_trend > 5:
                 trend = "improving"
             elif recent_trend < -5:
@@ -455,14 +542,14 @@ class PathRecommendationEngine:
             trend = "insufficient_data"
         
         # 计算一致性（标准差）
-        consistency = float(np.std(scores)) if len(scores) > 1 else 0
+        consistency = score_std if len(scores) > 1 else 0
         
         # 分析具体维度表现
         dimension_analysis = self._analyze_dimension_performance(recent_assessments)
         
         return {
             "trend": trend,
-            "average_score": float(np.mean(scores)),
+            "average_score": average_score,
             "consistency": consistency,
             "score_range": {"min": min(scores), "max": max(scores)},
             "recent_scores": scores[-3:],  # 最近3次得分
@@ -486,11 +573,12 @@ class PathRecommendationEngine:
                     dim_scores.append(breakdown[dim])
             
             if dim_scores:
+                dim_average, _ = _mean_and_std(dim_scores)
                 analysis[dim] = {
-                    "average": float(np.mean(dim_scores)),
+                    "average": dim_average,
                     "trend": "stable",  # 简化处理
                     "lowest_score": min(dim_scores),
-                    "needs_attention": float(np.mean(dim_scores)) < 60
+                    "needs_attention": dim_average < 60
                 }
         
         return analysis
@@ -507,8 +595,8 @@ class PathRecommendationEngine:
         # 分析学习时间模式
         study_hours = behavioral_data.get("weekly_study_hours", [])
         if study_hours:
-            avg_hours = np.mean(study_hours)
-            consistency = 1.0 - (np.std(study_hours) / max(avg_hours, 1))
+            avg_hours, hours_std = _mean_and_std(study_hours)
+            consistency = 1.0 - (hours_std / max(avg_hours, 1))
         else:
             avg_hours = 0
             consistency = 0
@@ -2,7 +2,7 @@
 
 from __future__ import annotations
 
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List
 from datetime import datetime
 
 from sqlalchemy import text
@@ -11,6 +11,81 @@ from ..config.database import get_db_session_context
 from ..models.learning_path import Channel, NodeStatus
 
 
+_UPSERT_STUDENT_PROGRESS_SQL = text(
+    """
+    INSERT INTO student_progress (
+        student_id, current_node_id, current_channel, total_study_hours,
+        frustration_level, started_at, last_activity_at
+    ) VALUES (:sid, :nid, :ch, :hours, :fru, :started, :last)
+    ON DUPLICATE KEY UPDATE
+        current_node_id = VALUES(current_node_id),
+        current_channel = VALUES(current_channel),
+        total_study_hours = VALUES(total_study_hours),
+        frustration_level = VALUES(frustration_level),
+        last_activity_at = VALUES(last_activity_at)
+    """
+)
+
+_UPSERT_NODE_PROGRESS_SQL = text(
+    """
+    INSERT INTO student_progress_nodes (
+        student_id, node_id, status, used_channel, score, attempt_count, started_at, completed_at
+    ) VALUES (:sid, :nid, :st, :uch, :score, :attempts, :started, :completed)
+    ON DUPLICATE KEY UPDATE
+        status = VALUES(status),
+        used_channel = VALUES(used_channel),
+        score = VALUES(score),
+        attempt_count = VALUES(attempt_count),
+        started_at = VALUES(started_at),
+        completed_at = VALUES(completed_at)
+    """
+)
+
+
+def _student_progress_params(
+    student_id: str,
+    current_node_id: str,
+    current_channel: Channel,
+    total_study_hours: float,
+    frustration_level: float,
+    started_at: datetime,
+    last_activity_at: datetime,
+) -> Dict[str, Any]:
+    """学生全局进度写入参数"""
+    return {
+        "sid": student_id,
+        "nid": current_node_id,
+        "ch": current_channel.value,
+        "hours": total_study_hours,
+        "fru": frustration_level,
+        "started": started_at,
+        "last": last_activity_at,
+    }
+
+
+def _node_progress_params(
+    student_id: str,
+    node_id: str,
+    status: NodeStatus,
+    used_channel: Optional[Channel],
+    score: Optional[float],
+    attempt_count: int,
+    started_at: Optional[datetime],
+    completed_at: Optional[datetime],
+) -> Dict[str, Any]:
+    """节点进度写入参数"""
+    return {
+        "sid": student_id,
+        "nid": node_id,
+        "st": status.value,
+        "uch": used_channel.value if used_channel else None,
+        "score": score,
+        "attempts": attempt_count,
+        "started": started_at,
+        "completed": completed_at,
+    }
+
+
 class ProgressRepository:
     """封装 student_progress 与 student_progress_nodes 的读写操作"""
 
@@ -62,29 +137,11 @@ class ProgressRepository:
         """插入或更新学生全局进度"""
         with get_db_session_context() as session:
             session.execute(
-                text(
-                    """
-                    INSERT INTO student_progress (
-                        student_id, current_node_id, current_channel, total_study_hours,
-                        frustration_level, started_at, last_activity_at
-                    ) VALUES (:sid, :nid, :ch, :hours, :fru, :started, :last)
-                    ON DUPLICATE KEY UPDATE
-                        current_node_id = VALUES(current_node_id),
-                        current_channel = VALUES(current_channel),
-                        total_study_hours = VALUES(total_study_hours),
-                        frustration_level = VALUES(frustration_level),
-                        last_activity_at = VALUES(last_activity_at)
-                    """
+                _UPSERT_STUDENT_PROGRESS_SQL,
+                _student_progress_params(
+                    student_id, current_node_id, current_channel, total_study_hours,
+                    frustration_level, started_at, last_activity_at,
                 ),
-                {
-                    "sid": student_id,
-                    "nid": current_node_id,
-                    "ch": current_channel.value,
-                    "hours": total_study_hours,
-                    "fru": frustration_level,
-                    "started": started_at,
-                    "last": last_activity_at,
-                },
             )
 
     @staticmethod
@@ -129,31 +186,38 @@ class ProgressRepository:
         """插入或更新某个节点的进度"""
         with get_db_session_context() as session:
             session.execute(
-                text(
-                    """
-                    INSERT INTO student_progress_nodes (
-                        student_id, node_id, status, used_channel, score, attempt_count, started_at, completed_at
-                    ) VALUES (:sid, :nid, :st, :uch, :score, :attempts, :started, :completed)
-                    ON DUPLICATE KEY UPDATE
-                        status = VALUES(status),
-                        used_channel = VALUES(used_channel),
-                        score = VALUES(score),
-                        attempt_count = VALUES(attempt_count),
-                        started_at = VALUES(started_at),
-                        completed_at = VALUES(completed_at)
-                    """
+                _UPSERT_NODE_PROGRESS_SQL,
+                _node_progress_params(
+                    student_id, node_id, status, used_channel, score,
+                    attempt_count, started_at, completed_at,
+                ),
+            )
+
+    @staticmethod
+    def save_progress(
+        student_id: str,
+        current_node_id: str,
+        current_channel: Channel,
+        total_study_hours: float,
+        frustration_level: float,
+        started_at: datetime,
+        last_activity_at: datetime,
+        nodes: List[Dict[str, Any]],
+    ) -> None:
+        """在同一事务中写入学生全局进度和一组节点进度（每个节点为 upsert_node_progress 的参数字典）"""
+        with get_db_session_context() as session:
+            session.execute(
+                _UPSERT_STUDENT_PROGRESS_SQL,
+                _student_progress_params(
+                    student_id, current_node_id, current_channel, total_study_hours,
+                    frustration_level, started_at, last_activity_at,
                 ),
-                {
-                    "sid": student_id,
-                    "nid": node_id,
-                    "st": status.value,
-                    "uch": used_channel.value if used_channel else None,
-                    "score": score,
-                    "attempts": attempt_count,
-                    "started": started_at,
-                    "completed": completed_at,
-                },
             )
+            if nodes:
+                session.execute(
+                    _UPSERT_NODE_PROGRESS_SQL,
+                    [_node_progress_params(student_id, **node) for node in nodes],
+                )
 
     @staticmethod
     def clear_student_progress(student_id: str) -> None:
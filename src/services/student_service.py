@@ -234,8 +234,8 @@ class StudentService:
             learning_records = learning_data["records"]
             
             # 获取学习路径进度
-            from ..services.learning_path_service import LearningPathService
-            path_service = LearningPathService()
+            from ..services.learning_path_service import get_learning_path_service
+            path_service = get_learning_path_service()
             student_progress = path_service.get_student_progress(student_id)
             
             logger.info(f"📊 获取学习统计 - 学生: {student_id}")